@@ -1,16 +1,28 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import json
-import os
 import requests
-import time
 import plotly.express as px
 
+import analytics
+import data_access
+from live_aggregates import window_rows
+from live_panel import live_fragment, open_feed, recent_transactions
+
 st.set_page_config(page_title="Fraud Analytics", layout="wide")
 
 API_URL = "http://127.0.0.1:5000"
-LIVE_FILE = "live_stream.json"
+LIVE_FILE = "live_stream.json"   # legacy list, imported once into the event store
+DATASET = "dataset_clean.csv"
+DATASET_COLUMNS = [
+    "order_amount", "product_category", "payment_method", "return_reason",
+    "past_returns", "delivery_delay_days", "refund_type", "is_fraud", "customer_id",
+]
+DATASET_CHECK_SECONDS = 5
+CHART_COLUMNS = ["order_amount", "past_returns", "is_fraud", "customer_id"]
+
+
+feed = open_feed(LIVE_FILE)
+
 
 st.title("🛍️ E-Commerce Fraud Detection & Real-Time Monitoring")
 
@@ -70,15 +82,7 @@ with tabs[0]:
             st.success(f"Fraud Probability: {res['fraud_probability']}")
             st.write("Decision:", res["decision"])
 
-            if os.path.exists(LIVE_FILE):
-                live = json.load(open(LIVE_FILE))
-            else:
-                live = []
-
-            data["is_fraud"] = res["is_fraud"]
-            live.append(data)
-
-            json.dump(live, open(LIVE_FILE, "w"))
+            # the API publishes the scored event to the live feed itself
 
         except Exception:
             st.error("API error — make sure fraud_api.py is running")
@@ -91,44 +95,41 @@ with tabs[1]:
 
     st.subheader("Real-Time Fraud Dashboard")
 
-    refresh = st.checkbox("Auto Refresh", value=True)
-    interval = st.slider("Refresh every (seconds)", 2, 10, 4)
-
-    placeholder = st.empty()
-
-    if os.path.exists(LIVE_FILE):
-        live = json.load(open(LIVE_FILE))
-        df = pd.DataFrame(live)
+    refresh = st.checkbox("Live updates", value=True)
 
-        if len(df):
+    # only the live panel reruns, and only when the feed moves; the analytics
+    # tab is left alone. A redraw reads the feed's in-memory snapshot (running
+    # totals and 1m / 5m / 1h windows), so it costs the same however long the history
+    def live_panel(snap):
+        total = snap["total"]
 
+        if total["count"]:
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Requests", len(df))
-            col2.metric("Fraud Cases", int(df['is_fraud'].sum()))
+            col1.metric("Total Requests", total["count"])
+            col2.metric("Fraud Cases", total["fraud"])
             col3.metric(
                 "Fraud Rate",
-                f"{round(df['is_fraud'].mean()*100, 2)} %"
+                f"{round(total['fraud_rate']*100, 2)} %"
             )
 
             st.markdown("---")
 
-            df["risk"] = np.where(df["is_fraud"] == 1, "High", "Low")
+            fig = px.pie(
+                names=["High", "Low"],
+                values=[total["fraud"], total["count"] - total["fraud"]]
+            )
+            st.plotly_chart(fig, use_container_width=True, key="live_risk")
 
-            fig = px.pie(df, names="risk")
-            st.plotly_chart(fig, use_container_width=True, key=f"risk_{time.time()}")
+            st.subheader("Sliding Windows")
+            st.dataframe(pd.DataFrame(window_rows(snap)), hide_index=True)
 
             st.subheader("Recent Transactions")
-            st.dataframe(df.tail(12))
+            st.dataframe(recent_transactions(snap, 12))
 
         else:
-            st.info("Waiting for live data...")
-
-    else:
-        st.info("Make predictions to generate live data")
+            st.info("Make predictions to generate live data")
 
-    if refresh:
-        time.sleep(interval)
-        st.experimental_rerun()
+    live_fragment(feed, live_panel, live=refresh)
 
 
 # -------------------------------------------------
@@ -141,8 +142,7 @@ with tabs[2]:
     # ----- SIDEBAR CONTROLS -----
     st.sidebar.title("⚙ Controls")
 
-    refresh_adv = st.sidebar.checkbox("Auto refresh (simulated real-time)")
-    interval_adv = st.sidebar.slider("Refresh interval (seconds)", 2, 15, 5)
+    refresh_adv = st.sidebar.checkbox("Auto refresh when the dataset changes")
 
     st.sidebar.markdown("---")
 
@@ -160,81 +160,86 @@ with tabs[2]:
         default=["Clothing", "Electronics", "Footwear", "Books", "Cosmetics"]
     )
 
-    @st.cache_data
-    def load_data():
-        df = pd.read_csv("dataset_clean.csv")
-
+    # runs once per dataset version; the frame and its bitmap indexes
+    # (risk, category, reason, payment, fraud) are shared by every session
+    def build_view(df):
         if "customer_id" not in df.columns:
-            df["customer_id"] = np.random.randint(1000, 5000, len(df))
+            analytics.add_customer_ids(df)
 
-        df["risk"] = np.where(
-            df["is_fraud"] == 1,
-            "High",
-            np.where(df["past_returns"] >= 3, "Medium", "Low")
-        )
+        df["risk"] = analytics.risk_labels(df)
 
-        return df
+        return df, analytics.build_index(df)
 
-    df = load_data()
-    df = df[df["risk"].isin(risk_filter)]
-    df = df[df["product_category"].isin(category_filter)]
+    # the analytics rerun on their own, never with the live tab; with auto
+    # refresh on they redraw every few seconds but only reload the dataset
+    # when its content changes
+    @st.fragment(run_every=DATASET_CHECK_SECONDS if refresh_adv else None)
+    def analytics_panel():
+        df, index = data_access.load_prepared(
+            DATASET, build_view, DATASET_COLUMNS, skip_missing=True
+        )
+
+        # filters and KPIs are bitmap ANDs / popcounts; the frame itself is
+        # only sliced for the charts that need rows, and only their columns
+        selection = analytics.select_rows(index, risk_filter, category_filter)
+        total = index.count(selection)
+        if total == len(df):
+            recent = df.tail(15)
+            df = df[CHART_COLUMNS]
+        else:
+            rows = index.row_ids(selection)
+            recent = df.take(rows[-15:])
+            df = df[CHART_COLUMNS].take(rows)
 
-    # KPIs
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Requests", len(df))
-    col2.metric("High Risk", len(df[df["risk"]=="High"]))
-    col3.metric("Medium Risk", len(df[df["risk"]=="Medium"]))
-    col4.metric("Low Risk", len(df[df["risk"]=="Low"]))
+        # KPIs
+        risk = analytics.indexed_risk_counts(index, selection)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Requests", total)
+        col2.metric("High Risk", risk["High"])
+        col3.metric("Medium Risk", risk["Medium"])
+        col4.metric("Low Risk", risk["Low"])
 
-    st.markdown("---")
+        st.markdown("---")
 
-    c1, c2, c3 = st.columns(3)
+        c1, c2, c3 = st.columns(3)
 
-    with c1:
-        pie = px.pie(df, names="risk")
-        st.plotly_chart(pie, use_container_width=True, key=f"adv1_{time.time()}")
+        with c1:
+            pie = px.pie(names=list(risk), values=list(risk.values()))
+            st.plotly_chart(pie, use_container_width=True, key="adv1")
 
-    with c2:
-        fraud_cat = df[df["is_fraud"]==1]["product_category"].value_counts()
-        bar = px.bar(fraud_cat, title="Fraud by Category")
-        st.plotly_chart(bar, use_container_width=True, key=f"adv2_{time.time()}")
+        with c2:
+            fraud_cat = analytics.indexed_fraud_by_category(index, selection)
+            bar = px.bar(fraud_cat, title="Fraud by Category")
+            st.plotly_chart(bar, use_container_width=True, key="adv2")
 
-    with c3:
-        reasons = df["return_reason"].value_counts()
-        reason_chart = px.bar(reasons, title="Most Common Refund Reasons")
-        st.plotly_chart(reason_chart, use_container_width=True, key=f"adv3_{time.time()}")
+        with c3:
+            reasons = analytics.indexed_reason_counts(index, selection)
+            reason_chart = px.bar(reasons, title="Most Common Refund Reasons")
+            st.plotly_chart(reason_chart, use_container_width=True, key="adv3")
 
-    st.markdown("---")
+        st.markdown("---")
 
-    a1, a2 = st.columns(2)
+        a1, a2 = st.columns(2)
 
-    with a1:
-        heat = pd.crosstab(df["past_returns"], df["is_fraud"])
-        heatmap = px.imshow(heat, text_auto=True)
-        st.plotly_chart(heatmap, use_container_width=True, key=f"adv4_{time.time()}")
+        with a1:
+            heat = analytics.returns_crosstab(df)
+            heatmap = px.imshow(heat, text_auto=True)
+            st.plotly_chart(heatmap, use_container_width=True, key="adv4")
 
-    with a2:
-        amount_trend = px.box(df, x="is_fraud", y="order_amount")
-        st.plotly_chart(amount_trend, use_container_width=True, key=f"adv5_{time.time()}")
+        with a2:
+            amount_trend = px.box(df, x="is_fraud", y="order_amount")
+            st.plotly_chart(amount_trend, use_container_width=True, key="adv5")
 
-    st.markdown("---")
+        st.markdown("---")
 
-    st.subheader("🚨 Top Risky Customers")
+        st.subheader("🚨 Top Risky Customers")
 
-    risky = (
-        df.groupby("customer_id")["is_fraud"]
-        .sum()
-        .sort_values(ascending=False)
-        .head(10)
-        .reset_index()
-    )
+        risky = analytics.top_risky_customers(df, 10)
 
-    risky_fig = px.bar(risky, x="customer_id", y="is_fraud")
-    st.plotly_chart(risky_fig, use_container_width=True, key=f"adv6_{time.time()}")
+        risky_fig = px.bar(risky, x="customer_id", y="is_fraud")
+        st.plotly_chart(risky_fig, use_container_width=True, key="adv6")
 
-    st.subheader("📄 Recent Transactions")
-    st.dataframe(df.tail(15))
+        st.subheader("📄 Recent Transactions")
+        st.dataframe(recent)
 
-    if refresh_adv:
-        time.sleep(interval_adv)
-        st.experimental_rerun()
+    analytics_panel()
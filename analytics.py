@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from bitmap_index import BitmapIndex
+
+# -------------------------------------------------
+# DATASET ANALYTICS
+# the aggregations behind the advanced dashboard, kept
+# free of Streamlit so bench_suite.py can time them. The
+# indexed_* variants answer the same questions from a
+# BitmapIndex instead of scanning the frame
+# -------------------------------------------------
+
+RISK_LEVELS = ["High", "Medium", "Low"]
+INDEXED_COLUMNS = ["risk", "product_category", "return_reason", "payment_method", "is_fraud"]
+
+
+def risk_labels(df):
+    # fraud -> High, frequent returners -> Medium, everyone else -> Low
+    return np.where(
+        df["is_fraud"] == 1,
+        "High",
+        np.where(df["past_returns"] >= 3, "Medium", "Low")
+    )
+
+
+def add_customer_ids(df, rng=None):
+    # the exports carry no customer key; assign synthetic ones
+    rng = np.random.default_rng() if rng is None else rng
+    df["customer_id"] = rng.integers(1000, 5000, len(df))
+    return df
+
+
+def filter_frame(df, risks, categories):
+    return df[df["risk"].isin(risks) & df["product_category"].isin(categories)]
+
+
+def risk_counts(df):
+    counts = df["risk"].value_counts()
+    return {level: int(counts.get(level, 0)) for level in RISK_LEVELS}
+
+
+def _present(counts):
+    # Categorical columns also count categories that were filtered away
+    return counts[counts > 0]
+
+
+def fraud_by_category(df):
+    return _present(df.loc[df["is_fraud"] == 1, "product_category"].value_counts())
+
+
+def reason_counts(df):
+    return _present(df["return_reason"].value_counts())
+
+
+def returns_crosstab(df):
+    return pd.crosstab(df["past_returns"], df["is_fraud"])
+
+
+def top_risky_customers(df, n=10):
+    return (
+        df.groupby("customer_id")["is_fraud"]
+        .sum()
+        .sort_values(ascending=False)
+        .head(n)
+        .reset_index()
+    )
+
+
+# -------------------------------------------------
+# BITMAP-INDEXED FILTERS AND KPIS
+# -------------------------------------------------
+def build_index(df):
+    return BitmapIndex(df, [c for c in INDEXED_COLUMNS if c in df.columns])
+
+
+def select_rows(index, risks, categories):
+    # same rows as filter_frame(), as a bitmap
+    return index.select({"risk": risks, "product_category": categories})
+
+
+def indexed_risk_counts(index, selection):
+    return {level: index.count(selection, index.bitmap("risk", level)) for level in RISK_LEVELS}
+
+
+def indexed_fraud_by_category(index, selection):
+    return index.value_counts("product_category", selection & index.bitmap("is_fraud", 1))
+
+
+def indexed_reason_counts(index, selection):
+    return index.value_counts("return_reason", selection)
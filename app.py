@@ -1,12 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import json
 import os
 import requests
-import time
 import plotly.express as px
 
+import data_access
+from live_aggregates import window_rows
+from live_panel import live_fragment, open_feed, recent_transactions
+
 
 # -------------------------------------------------
 # PAGE STYLE
@@ -67,7 +69,68 @@ p, span, label{
 
 
 API_URL = "http://127.0.0.1:5000"
-LIVE_FILE = "live_stream.json"
+LIVE_FILE = "live_stream.json"   # legacy list, imported once into the event store
+BATCH_SIZE = 2000
+# raw export columns tab 3 shows and scores
+DATASET_COLUMNS = [
+    "Product_Category", "Product_Price", "Payment_Method",
+    "Return_Reason", "Return_Status", "Days_to_Return",
+]
+
+
+feed = open_feed(LIVE_FILE)
+
+
+def load_dataset(path):
+    # process-wide, shared by every session; reloaded only when the file's content changes
+    return data_access.load_dataset(path, DATASET_COLUMNS, decode=True, skip_missing=True)
+
+
+def served_model_version():
+    try:
+        return requests.get(f"{API_URL}/model", timeout=2).json()["version"]
+    except Exception:
+        return None
+
+
+# tab 3 is only re-scored when the dataset's content or the served model changes;
+# the scored frame is shared by every session, not copied into each one
+@st.cache_resource(show_spinner="Scoring dataset...", max_entries=4)
+def score_dataset(path, dataset_version, model_version):
+    df = load_dataset(path)
+
+    final_df = pd.DataFrame({
+        "order_amount": df["Product_Price"].fillna(0),
+        "product_category": df["Product_Category"].fillna("Unknown"),
+        "payment_method": df["Payment_Method"].fillna("Unknown"),
+        "return_reason": df["Return_Reason"].fillna("Unknown"),
+        "past_returns": 0,
+        "delivery_delay_days": df["Days_to_Return"].fillna(0),
+        "refund_type": "Post"
+    })
+
+    # score in chunks through /predict_batch (one forest call per chunk).
+    # A failed chunk raises: cache_resource doesn't keep exceptions, so a
+    # partial result is never shared and the next run tries again
+    results = []
+
+    for start in range(0, len(final_df), BATCH_SIZE):
+        chunk = final_df.iloc[start:start + BATCH_SIZE]
+        payload = {"columns": chunk.to_dict(orient="list")}
+
+        res = requests.post(f"{API_URL}/predict_batch", json=payload, timeout=60)
+        res.raise_for_status()
+        r = res.json()
+        results.append(pd.DataFrame({
+            "fraud_probability": r["fraud_probability"],
+            "is_fraud": r["is_fraud"],
+            "decision": r["decision"]
+        }))
+
+    results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame(
+        columns=["fraud_probability", "is_fraud", "decision"]
+    )
+    return pd.concat([df.reset_index(drop=True), results_df], axis=1)
 
 
 st.markdown(
@@ -137,14 +200,7 @@ with tabs[0]:
             st.success(f"Fraud Probability: {res['fraud_probability']}")
             st.write("Decision:", res["decision"])
 
-            if os.path.exists(LIVE_FILE):
-                live = json.load(open(LIVE_FILE))
-            else:
-                live = []
-
-            data["is_fraud"] = res["is_fraud"]
-            live.append(data)
-            json.dump(live, open(LIVE_FILE, "w"))
+            # the API publishes the scored event to the live feed itself
 
         except:
             st.error("API error — make sure fraud_api.py is running")
@@ -162,46 +218,41 @@ with tabs[1]:
 
     st.subheader("Real-Time Fraud Dashboard")
 
-    refresh = st.checkbox("Auto Refresh", value=True)
-    interval = st.slider("Refresh every (seconds)", 2, 10, 4)
-
-    if os.path.exists(LIVE_FILE):
-        live = json.load(open(LIVE_FILE))
-        df = pd.DataFrame(live)
+    refresh = st.checkbox("Live updates", value=True)
 
-        if len(df):
+    # only the live panel reruns, and only when the feed moves; tabs 1 and 3
+    # are left alone. A redraw reads the feed's in-memory snapshot (running
+    # totals and 1m / 5m / 1h windows), so it costs the same however long the history
+    def live_panel(snap):
+        total = snap["total"]
 
+        if total["count"]:
             col1,col2,col3 = st.columns(3)
-            col1.metric("Total Requests", len(df))
-            col2.metric("Fraud Cases", int(df["is_fraud"].sum()))
-            col3.metric("Fraud Rate", f"{round(df['is_fraud'].mean()*100,2)} %")
+            col1.metric("Total Requests", total["count"])
+            col2.metric("Fraud Cases", total["fraud"])
+            col3.metric("Fraud Rate", f"{round(total['fraud_rate']*100,2)} %")
 
             st.markdown("---")
 
-            df["risk"] = np.where(df["is_fraud"] == 1, "High", "Low")
-
             fig = px.pie(
-                df,
-                names="risk",
+                names=["High", "Low"],
+                values=[total["fraud"], total["count"] - total["fraud"]],
                 title="Fraud Risk Split",
                 hole=0.4
             )
             fig.update_traces(pull=[0.1, 0])
+            st.plotly_chart(fig, use_container_width=True, key="live_risk")
 
-            st.plotly_chart(fig, use_container_width=True, key=f"risk_{time.time()}")
+            st.subheader("Sliding Windows")
+            st.dataframe(pd.DataFrame(window_rows(snap)), hide_index=True)
 
             st.subheader("Recent Transactions")
-            st.dataframe(df.tail(12))
+            st.dataframe(recent_transactions(snap, 12))
 
         else:
-            st.info("Waiting for live data...")
-
-    else:
-        st.info("Make predictions first")
+            st.info("Make predictions first")
 
-    if refresh:
-        time.sleep(interval)
-        st.rerun()
+    live_fragment(feed, live_panel, live=refresh)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -222,19 +273,14 @@ with tabs[2]:
         "ecommerce_returns_synthetic_data.csv"
     ]
 
-    df = None
-    loaded_file = None
+    loaded_file = next((f for f in candidate_files if os.path.exists(f)), None)
 
-    for f in candidate_files:
-        if os.path.exists(f):
-            df = pd.read_csv(f)
-            loaded_file = f
-            break
-
-    if df is None:
+    if loaded_file is None:
         st.error("No dataset found")
 
     else:
+        df = load_dataset(loaded_file)
+
         st.success(f"Loaded file: {loaded_file}")
 
         st.dataframe(df.head())
@@ -276,34 +322,24 @@ with tabs[2]:
         st.markdown("---")
 
         # ---------- FRAUD PREDICTIONS ----------
-        final_df = pd.DataFrame({
-            "order_amount": df["Product_Price"].fillna(0),
-            "product_category": df["Product_Category"].fillna("Unknown"),
-            "payment_method": df["Payment_Method"].fillna("Unknown"),
-            "return_reason": df["Return_Reason"].fillna("Unknown"),
-            "past_returns": 0,
-            "delivery_delay_days": df["Days_to_Return"].fillna(0),
-            "refund_type": "Post"
-        })
-
-        results = []
+        model_version = served_model_version()
+        final = None
 
-        for _, row in final_df.iterrows():
-            payload = dict(row)
+        if model_version is None:
+            st.error("API error — make sure fraud_api.py is running")
 
+        else:
             try:
-                r = requests.post(f"{API_URL}/predict", json=payload).json()
-                results.append(r)
-            except:
-                results.append({"fraud_probability":None,"is_fraud":None})
-
-        results_df = pd.DataFrame(results)
-        final = pd.concat([df.reset_index(drop=True), results_df], axis=1)
+                final = score_dataset(loaded_file, data_access.dataset_version(loaded_file), model_version)
+            except (requests.RequestException, KeyError) as e:
+                st.error(f"Scoring failed, try again — {e}")
 
-        st.subheader("Fraud Summary")
-        st.dataframe(final.head(25))
+        if final is not None:
+            st.subheader("Fraud Summary")
+            st.caption(f"Scored by model {model_version}")
+            st.dataframe(final.head(25))
 
-        fraud_chart = px.pie(final, names="is_fraud", hole=0.4)
-        st.plotly_chart(fraud_chart, use_container_width=True)
+            fraud_chart = px.pie(final, names="is_fraud", hole=0.4)
+            st.plotly_chart(fraud_chart, use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,59 @@
+import pickle
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from featurizer import Featurizer
+from forest_engine import FlatForest
+
+# -------------------------------------------------
+# BENCHMARK: sklearn forest vs compiled flat forest
+# python bench_forest.py
+# -------------------------------------------------
+
+warnings.filterwarnings("ignore")
+
+pipe = pickle.load(open("fraud_model.pkl", "rb"))
+featurizer = Featurizer.from_pipeline(pipe)
+estimator = pipe.named_steps["model"]
+forest = FlatForest.from_sklearn(estimator)
+
+rng = np.random.default_rng(7)
+
+
+def random_frame(n):
+    data = {col: rng.choice(values, n) for col, values in featurizer.categories}
+    data["order_amount"] = rng.integers(300, 7000, n)
+    data["past_returns"] = rng.integers(0, 8, n)
+    data["delivery_delay_days"] = rng.integers(0, 5, n)
+    return pd.DataFrame(data)
+
+
+def timeit(fn, repeat):
+    fn()
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+# ---- agreement ----
+X = featurizer.transform_frame(random_frame(20000))
+diff = np.abs(estimator.predict_proba(X)[:, 1] - forest.predict_proba(X)).max()
+print(f"trees={forest.n_trees} nodes={forest.n_nodes} depth={forest.max_depth} bytes={forest.nbytes}")
+print(f"max |sklearn - flat| over 20000 rows: {diff:.3g}")
+print()
+
+# ---- timings ----
+print(f"{'rows':>8} {'sklearn ms':>12} {'flat ms':>10} {'speedup':>8}")
+
+for n, repeat in [(1, 300), (100, 100), (1000, 30), (10000, 5)]:
+    X = featurizer.transform_frame(random_frame(n))
+    t_sk = timeit(lambda: estimator.predict_proba(X), repeat)
+    t_flat = timeit(lambda: forest.predict_proba(X), repeat)
+    print(f"{n:>8} {t_sk * 1e3:>12.3f} {t_flat * 1e3:>10.3f} {t_sk / t_flat:>7.1f}x")
@@ -0,0 +1,331 @@
+import argparse
+import gc
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import analytics
+import columnar
+import etl
+from add_risk_data import add_risk
+from featurizer import CATEGORICAL, NUMERIC
+from generate_dataset import generate_chunk, pick
+from prepare_dataset import prepare
+
+# -------------------------------------------------
+# BENCHMARK SUITE
+#
+# times the hot paths on seeded synthetic datasets:
+#   model_load              unpickle fraud_model.pkl
+#   predict_single          200 one-row predict_proba calls
+#   predict_batch[n]        predict_proba over n rows
+#   prepare_dataset[n]      read the raw export + prepare()
+#   add_risk_data[n]        read the clean CSV + add_risk()
+#   etl[n]                  chunked raw -> clean pipeline (etl.py), all cores
+#   load_csv[n]             pd.read_csv of the clean dataset
+#   load_columnar[n]        the same columns from its columnar copy
+#   value_counts[n]         dashboard KPIs / category / reason counts
+#   crosstab[n]             past_returns x is_fraud
+#   groupby_customer[n]     top risky customers
+#   isin_kpis[n]            filter + KPI counts by scanning the frame
+#   bitmap_build[n]         bitmap indexes for the dashboard filters
+#   bitmap_kpis[n]          the same filter + KPIs from the indexes
+#
+# every case is the best of several runs; results are
+# compared with the baseline file and the run exits 1 when
+# a case is more than --threshold slower than its baseline
+#
+# python bench_suite.py --sizes 10k,1m --save-baseline
+# python bench_suite.py --sizes 10k,1m --threshold 0.2
+# -------------------------------------------------
+
+warnings.filterwarnings("ignore")
+
+MODEL_FILE = "fraud_model.pkl"
+BASELINE_FILE = "bench_baseline.json"
+DATA_DIR = "bench_data"   # generated CSVs, reused across runs
+
+# rows, runs per case
+SIZES = {
+    "10k": (10_000, 5),
+    "1m": (1_000_000, 3),
+    "10m": (10_000_000, 1),
+}
+
+SINGLE_ROW_CALLS = 200
+# a typical dashboard filter: two risk levels, three categories
+FILTER = (["High", "Medium"], ["Clothing", "Electronics", "Footwear"])
+PREDICT_CHUNK = 100_000   # bounds the one-hot matrix for the big sizes
+WRITE_CHUNK = 1_000_000
+
+# raw export schema (what dataset.csv looks like before prepare_dataset.py)
+RAW_CATEGORIES = ["Clothing", "Books", "Toys", "Electronics", "Home"]
+RAW_PAYMENTS = ["Debit Card", "Credit Card", "PayPal", "Gift Card"]
+RAW_REASONS = ["Changed mind", "Wrong item", "Defective", "Not as described"]
+RAW_SHIPPING = ["Next-Day", "Express", "Standard"]
+RAW_GENDERS = ["Male", "Female"]
+
+
+# -------------------------------------------------
+# SYNTHETIC DATA
+# -------------------------------------------------
+def synthetic_clean(n, seed):
+    # dataset_clean.csv layout plus customer_id / risk, as the dashboard sees it
+    rng = np.random.default_rng(seed)
+    df = generate_chunk(rng, n)
+    analytics.add_customer_ids(df, rng)
+    df["risk"] = analytics.risk_labels(df)
+    return df
+
+
+def synthetic_raw(n, seed):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n)
+    ordered = np.datetime64("2023-01-01") + rng.integers(0, 730, n)
+    returned = rng.random(n) < 0.5
+    days = rng.integers(1, 400, n)
+
+    df = pd.DataFrame({
+        "Order_ID": pd.Series(ids).map("ORD{:08d}".format),
+        "Product_ID": pd.Series(ids).map("PROD{:08d}".format),
+        "User_ID": pd.Series(ids).map("USER{:08d}".format),
+        "Order_Date": ordered.astype(str),
+        "Return_Date": np.where(returned, (ordered + days).astype(str), None),
+        "Product_Category": pick(rng, RAW_CATEGORIES, n),
+        "Product_Price": np.round(rng.uniform(5, 500, n), 2),
+        "Order_Quantity": rng.integers(1, 6, n),
+        "Return_Reason": np.where(returned, pick(rng, RAW_REASONS, n), None),
+        "Return_Status": np.where(returned, "Returned", "Not Returned"),
+        "Days_to_Return": np.where(returned, days.astype(float), np.nan),
+        "User_Age": rng.integers(18, 71, n),
+        "User_Gender": pick(rng, RAW_GENDERS, n),
+        "User_Location": pd.Series(rng.integers(1, 101, n)).map("City{}".format),
+        "Payment_Method": pick(rng, RAW_PAYMENTS, n),
+        "Shipping_Method": pick(rng, RAW_SHIPPING, n),
+        "Discount_Applied": np.round(rng.uniform(0, 50, n), 2),
+    })
+    return df
+
+
+def dataset_csv(kind, n, seed):
+    # written in chunks once per (kind, size, seed) and reused afterwards
+    path = os.path.join(DATA_DIR, f"{kind}-{n}-{seed}.csv")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    make = synthetic_raw if kind == "raw" else synthetic_clean
+    tmp = path + ".tmp"
+
+    for i, start in enumerate(range(0, n, WRITE_CHUNK)):
+        chunk = make(min(WRITE_CHUNK, n - start), seed + i)
+        if kind == "clean":
+            chunk = chunk.drop(columns=["customer_id", "risk"])
+        chunk.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+    os.replace(tmp, path)
+    return path
+
+
+# -------------------------------------------------
+# TIMING
+# -------------------------------------------------
+def measure(fn, runs):
+    times = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"seconds": min(times), "median": statistics.median(times), "runs": runs}
+
+
+def predict_chunked(pipe, df):
+    for start in range(0, len(df), PREDICT_CHUNK):
+        pipe.predict_proba(df.iloc[start:start + PREDICT_CHUNK])
+
+
+def model_cases(pipe, seed):
+    frame = synthetic_clean(SINGLE_ROW_CALLS, seed)[CATEGORICAL + NUMERIC]
+    rows = [frame.iloc[[i]] for i in range(len(frame))]
+
+    def load():
+        with open(MODEL_FILE, "rb") as fh:
+            pickle.load(fh)
+
+    def single():
+        for row in rows:
+            pipe.predict_proba(row)
+
+    yield "model_load", 1, load, 5
+    yield "predict_single", SINGLE_ROW_CALLS, single, 3
+
+
+def sized_cases(pipe, label, seed):
+    n, runs = SIZES[label]
+    raw_csv = dataset_csv("raw", n, seed)
+    clean_csv = dataset_csv("clean", n, seed)
+    if not columnar.is_fresh(clean_csv):
+        columnar.convert(clean_csv)
+    etl_out = os.path.join(DATA_DIR, "etl-out.csv")
+
+    # file cases first: the in-memory frame isn't built until they're done
+    yield f"prepare_dataset[{label}]", n, lambda: prepare(pd.read_csv(raw_csv)), runs
+    yield f"add_risk_data[{label}]", n, lambda: add_risk(pd.read_csv(clean_csv), seed), runs
+    yield f"load_csv[{label}]", n, lambda: pd.read_csv(clean_csv), runs
+    yield f"load_columnar[{label}]", n, lambda: columnar.read_table(clean_csv), runs
+    yield f"etl[{label}]", n, lambda: etl.run(raw_csv, etl_out, workers=os.cpu_count(), seed=seed), runs
+
+    df = synthetic_clean(n, seed)
+    features = df[CATEGORICAL + NUMERIC]
+
+    def value_counts():
+        analytics.risk_counts(df)
+        analytics.fraud_by_category(df)
+        analytics.reason_counts(df)
+
+    def isin_kpis():
+        filtered = analytics.filter_frame(df, *FILTER)
+        analytics.risk_counts(filtered)
+        analytics.fraud_by_category(filtered)
+        analytics.reason_counts(filtered)
+
+    index = analytics.build_index(df)
+
+    def bitmap_kpis():
+        selection = analytics.select_rows(index, *FILTER)
+        analytics.indexed_risk_counts(index, selection)
+        analytics.indexed_fraud_by_category(index, selection)
+        analytics.indexed_reason_counts(index, selection)
+
+    yield f"predict_batch[{label}]", n, lambda: predict_chunked(pipe, features), runs
+    yield f"value_counts[{label}]", n, value_counts, runs
+    yield f"crosstab[{label}]", n, lambda: analytics.returns_crosstab(df), runs
+    yield f"groupby_customer[{label}]", n, lambda: analytics.top_risky_customers(df), runs
+    yield f"isin_kpis[{label}]", n, isin_kpis, runs
+    yield f"bitmap_build[{label}]", n, lambda: analytics.build_index(df), runs
+    yield f"bitmap_kpis[{label}]", n, bitmap_kpis, runs
+
+
+def run(sizes, seed, runs=None, only=None):
+    with open(MODEL_FILE, "rb") as fh:
+        pipe = pickle.load(fh)
+
+    groups = [model_cases(pipe, seed)] + [sized_cases(pipe, label, seed) for label in sizes]
+    results = {}
+
+    for group in groups:
+        for name, rows, fn, default_runs in group:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            result = measure(fn, runs or default_runs)
+            result["rows"] = rows
+            result["rows_per_s"] = round(rows / result["seconds"], 1)
+            results[name] = result
+            print(f"{name:<28} {result['seconds'] * 1e3:>12.2f} ms", flush=True)
+
+    return results
+
+
+# -------------------------------------------------
+# BASELINE
+# -------------------------------------------------
+def compare(results, baseline, threshold):
+    rows, regressions = [], []
+
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, result["seconds"], None, None))
+            continue
+        change = result["seconds"] / base["seconds"] - 1
+        rows.append((name, result["seconds"], base["seconds"], change))
+        if change > threshold:
+            regressions.append(name)
+
+    print()
+    print(f"{'case':<28} {'ms':>12} {'baseline ms':>12} {'change':>8}")
+    for name, seconds, base, change in rows:
+        if base is None:
+            print(f"{name:<28} {seconds * 1e3:>12.2f} {'-':>12} {'new':>8}")
+        else:
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<28} {seconds * 1e3:>12.2f} {base * 1e3:>12.2f} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh).get("results", {})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scoring, data loading and dashboard aggregation")
+    parser.add_argument("--sizes", default=",".join(SIZES),
+                        help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--cases", help="comma-separated case name prefixes to run")
+    parser.add_argument("--runs", type=int, help="runs per case (default depends on size)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="fail when a case is this much slower than baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="record this run's results in the baseline file")
+    parser.add_argument("--output", help="write this run's results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    only = [c.strip() for c in args.cases.split(",")] if args.cases else None
+
+    results = run(sizes, args.seed, args.runs, only)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+        "host": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "seed": args.seed,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        # merge so a run over some sizes keeps the others' numbers
+        report["results"] = dict(baseline, **results)
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) more than {args.threshold:.0%} slower than baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# BITMAP INDEXES FOR DASHBOARD FILTERS
+# one packed bitmap (a bit per row, in uint64 words) per
+# distinct value of each indexed column, built once per
+# dataset version. A filter is OR within a column and AND
+# across columns, a KPI is a popcount: at 10M rows a bitmap
+# is 156k words, so neither scans the frame itself
+# -------------------------------------------------
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(words):
+        return int(np.bitwise_count(words).sum())
+else:   # NumPy < 2.0
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return int(_BYTE_BITS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+class BitmapIndex:
+
+    def __init__(self, df, columns):
+        self.n_rows = len(df)
+        self.n_words = -(-self.n_rows // 64)
+        self.all = self._pack(np.ones(self.n_rows, dtype=bool))
+        self.bitmaps = {}
+
+        for name in columns:
+            # missing values get no bitmap, so they never match (as with isin)
+            codes, uniques = pd.factorize(df[name], sort=True)
+            self.bitmaps[name] = {
+                value: self._pack(codes == code)
+                for code, value in enumerate(pd.Index(uniques).tolist())
+            }
+
+    def _pack(self, mask):
+        # padding bits past n_rows stay zero, so popcounts never see them
+        packed = np.zeros(self.n_words * 8, dtype=np.uint8)
+        bits = np.packbits(mask)
+        packed[:len(bits)] = bits
+        return packed.view(np.uint64)
+
+    def empty(self):
+        return np.zeros(self.n_words, dtype=np.uint64)
+
+    def bitmap(self, name, value):
+        found = self.bitmaps[name].get(value)
+        return self.empty() if found is None else found
+
+    def any_of(self, name, values):
+        out = self.empty()
+        for value in values:
+            found = self.bitmaps[name].get(value)
+            if found is not None:
+                np.bitwise_or(out, found, out=out)
+        return out
+
+    def select(self, filters):
+        # {column: allowed values} -> rows matching every column
+        out = self.all.copy()
+        for name, values in filters.items():
+            np.bitwise_and(out, self.any_of(name, values), out=out)
+        return out
+
+    def count(self, *bitmaps):
+        # rows set in every one of `bitmaps` (all rows when none are given)
+        if not bitmaps:
+            return self.n_rows
+        return _popcount(functools.reduce(np.bitwise_and, bitmaps))
+
+    def value_counts(self, name, within=None):
+        # like Series.value_counts() over the rows in `within`, zeros dropped
+        counts = pd.Series({
+            value: self.count(bits) if within is None else self.count(within, bits)
+            for value, bits in self.bitmaps[name].items()
+        }, dtype=np.int64, name="count")
+        counts.index.name = name
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    def row_ids(self, selection):
+        return np.flatnonzero(np.unpackbits(selection.view(np.uint8), count=self.n_rows))
+
+    @property
+    def nbytes(self):
+        return sum(bits.nbytes for values in self.bitmaps.values() for bits in values.values())
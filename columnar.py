@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# COLUMNAR DATASET COPY (<name>.cols/ next to <name>.csv)
+#
+#   meta.json           rows, per-column kind / dtype /
+#                       dictionary, stat of the source CSV
+#   <col>.npy           numeric values, or int16 dictionary
+#                       codes (-1 = missing) for categoricals
+#   <col>.offsets.npy   + <col>.utf8 for other string columns
+#
+# every column is a plain .npy file loaded with mmap_mode="r":
+# a read projects to the columns asked for, never parses
+# text, and categoricals come back as pandas Categoricals
+# over the stored codes. read_table() falls back to the CSV
+# whenever the copy is missing or was built from an older
+# version of it
+# -------------------------------------------------
+
+META = "meta.json"
+NUMERIC, CATEGORY, STRING = "numeric", "category", "string"
+
+CODE_DTYPE = np.dtype("<i2")
+MAX_CATEGORIES = np.iinfo(CODE_DTYPE).max
+DICTIONARY_LIMIT = 1024   # auto-detect: distinct values in the first chunk
+
+NPY_HEADER_BYTES = 128    # fixed, so the row count can be patched in at close
+
+
+def columns_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".cols"
+
+
+def _npy_header(dtype, rows):
+    text = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (dtype.str, rows)
+    text = text.ljust(NPY_HEADER_BYTES - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin-1")
+
+
+def _stat(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# -------------------------------------------------
+# WRITING
+# -------------------------------------------------
+def encode(df):
+    # -> {name: (NUMERIC, values) | (STRING, local codes, uniques)}
+    # cheap to pickle, so pool workers can do it next to the parsing
+    encoded = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            encoded[name] = (NUMERIC, series.to_numpy())
+        else:
+            codes, uniques = pd.factorize(series)
+            encoded[name] = (STRING, codes, [str(u) for u in uniques])
+    return encoded
+
+
+class ColumnWriter:
+
+    def __init__(self, path, categorical=None, dtypes=None):
+        # categorical: string columns to dictionary-encode (default: any with
+        #   few distinct values in the first chunk); dtypes pins numeric dtypes
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.categorical = None if categorical is None else set(categorical)
+        self.dtypes = dtypes or {}
+
+        self.rows = 0
+        self.columns = {}
+
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+
+    def append(self, df):
+        self.write(encode(df), len(df))
+
+    def write(self, encoded, rows):
+        if self.columns and set(encoded) != set(self.columns):
+            raise ValueError(f"columns changed between chunks: {sorted(encoded)}")
+
+        for name, item in encoded.items():
+            col = self.columns.get(name) or self._open(name, item)
+            if col["kind"] == NUMERIC:
+                self._write_numeric(name, col, item)
+            elif col["kind"] == CATEGORY:
+                self._write_category(name, col, item)
+            else:
+                self._write_string(col, item)
+
+        self.rows += rows
+
+    def _open(self, name, item):
+        file = os.path.join(self.tmp, f"{name}.npy")
+
+        if item[0] == NUMERIC:
+            dtype = np.dtype(self.dtypes.get(name, item[1].dtype)).newbyteorder("<")
+            if dtype.kind not in "biuf":
+                raise ValueError(f"{name}: unsupported dtype {dtype}")
+            col = {"kind": NUMERIC, "dtype": dtype}
+
+        elif (name in self.categorical if self.categorical is not None
+              else len(item[2]) <= DICTIONARY_LIMIT):
+            col = {"kind": CATEGORY, "dtype": CODE_DTYPE, "dictionary": {}}
+
+        else:
+            col = {"kind": STRING, "dtype": np.dtype("<i8"), "end": 0}
+            col["data"] = open(os.path.join(self.tmp, f"{name}.utf8"), "wb")
+            file = os.path.join(self.tmp, f"{name}.offsets.npy")
+
+        col["fh"] = open(file, "wb")
+        col["fh"].write(b"\0" * NPY_HEADER_BYTES)
+        if col["kind"] == STRING:
+            col["fh"].write(np.zeros(1, dtype=col["dtype"]).tobytes())
+        self.columns[name] = col
+        return col
+
+    def _write_numeric(self, name, col, item):
+        if item[0] != NUMERIC:
+            raise ValueError(f"{name}: numeric column got text values")
+        try:
+            values = item[1].astype(col["dtype"], casting="same_kind", copy=False)
+        except TypeError:
+            raise ValueError(f"{name}: {item[1].dtype} values don't fit {col['dtype']}") from None
+        col["fh"].write(np.ascontiguousarray(values).tobytes())
+
+    def _write_category(self, name, col, item):
+        codes, uniques = self._as_text(name, item)
+        dictionary = col["dictionary"]
+        lookup = np.array(
+            [dictionary.setdefault(u, len(dictionary)) for u in uniques] + [-1], dtype=CODE_DTYPE
+        )
+        if len(dictionary) > MAX_CATEGORIES:
+            raise ValueError(f"{name}: more than {MAX_CATEGORIES} distinct values for a categorical")
+        col["fh"].write(lookup[codes].tobytes())   # code -1 indexes the trailing -1
+
+    def _write_string(self, col, item):
+        codes, uniques = self._as_text(None, item)
+        encoded = [u.encode("utf-8") for u in uniques] + [b""]   # missing -> empty
+        values = [encoded[c] for c in codes]
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        col["fh"].write((col["end"] + np.cumsum(lengths)).tobytes())
+        col["end"] += int(lengths.sum())
+        col["data"].write(b"".join(values))
+
+    @staticmethod
+    def _as_text(name, item):
+        if item[0] == NUMERIC:
+            # e.g. a chunk where a text column happens to be all blank (NaN)
+            codes, uniques = pd.factorize(pd.Series(item[1], dtype=object))
+            return codes, [str(u) for u in uniques]
+        return item[1], item[2]
+
+    def close(self, source=None):
+        # source: the CSV this is a copy of; readers check it hasn't changed since
+        meta = {"rows": self.rows, "columns": {}, "source": _stat(source) if source else None}
+
+        for name, col in self.columns.items():
+            rows = self.rows + 1 if col["kind"] == STRING else self.rows
+            col["fh"].seek(0)
+            col["fh"].write(_npy_header(col["dtype"], rows))
+            col["fh"].close()
+
+            info = {"kind": col["kind"], "dtype": col["dtype"].str}
+            if col["kind"] == CATEGORY:
+                info["categories"] = list(col["dictionary"])
+            elif col["kind"] == STRING:
+                col["data"].close()
+            meta["columns"][name] = info
+
+        with open(os.path.join(self.tmp, META), "w") as fh:
+            json.dump(meta, fh)
+
+        # a reader between these two steps finds no copy and uses the CSV
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp, self.path)
+        return meta
+
+    def abort(self):
+        for col in self.columns.values():
+            col["fh"].close()
+            if "data" in col:
+                col["data"].close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def write_table(df, csv_path, categorical=None, dtypes=None):
+    # columnar copy of a frame that was just written to csv_path
+    writer = ColumnWriter(columns_path(csv_path), categorical, dtypes)
+    try:
+        writer.append(df)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.close(source=csv_path)
+
+
+def convert(csv_path, chunk_size=500_000, categorical=None):
+    writer = ColumnWriter(columns_path(csv_path), categorical)
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            writer.append(chunk)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.close(source=csv_path)
+
+
+# -------------------------------------------------
+# READING
+# -------------------------------------------------
+def read_meta(path):
+    with open(os.path.join(path, META)) as fh:
+        return json.load(fh)
+
+
+def is_fresh(csv_path):
+    # the copy exists and was built from the CSV as it is now
+    try:
+        meta = read_meta(columns_path(csv_path))
+    except (OSError, ValueError):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return meta["source"] == _stat(csv_path)
+
+
+def _load(path, file, rows):
+    # np.load can't map a zero-length array
+    return np.load(os.path.join(path, file), mmap_mode="r" if rows else None)
+
+
+def read_columns(path, columns=None, decode=False):
+    # columns=None reads them all, [] none (as pd.read_csv's usecols)
+    # decode=True: categoricals as object arrays of str instead of Categorical
+    meta = read_meta(path)
+    rows = meta["rows"]
+    data = {}
+
+    for name in meta["columns"] if columns is None else columns:
+        info = meta["columns"].get(name)
+        if info is None:
+            raise KeyError(f"{name!r} not in {path}")
+
+        if info["kind"] == NUMERIC:
+            data[name] = _load(path, f"{name}.npy", rows)
+
+        elif info["kind"] == CATEGORY:
+            codes = _load(path, f"{name}.npy", rows)
+            if decode:
+                labels = np.array(info["categories"] + [None], dtype=object)
+                data[name] = labels[codes]   # code -1 -> None
+            else:
+                data[name] = pd.Categorical.from_codes(codes, info["categories"])
+
+        else:
+            offsets = _load(path, f"{name}.offsets.npy", rows + 1)
+            with open(os.path.join(path, f"{name}.utf8"), "rb") as fh:
+                blob = fh.read()
+            data[name] = np.array(
+                [blob[a:b].decode("utf-8") or None for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())],
+                dtype=object,
+            )
+
+    return pd.DataFrame(data, copy=False)
+
+
+def table_columns(csv_path):
+    if is_fresh(csv_path):
+        return list(read_meta(columns_path(csv_path))["columns"])
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def read_table(csv_path, columns=None, decode=False):
+    # the columnar copy when it's current, else the CSV (same columns)
+    if is_fresh(csv_path):
+        return read_columns(columns_path(csv_path), columns, decode)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write columnar copies of CSV files")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    for csv_path in args.csv:
+        meta = convert(csv_path, args.chunk_size)
+        path = columns_path(csv_path)
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        kinds = {name: info["kind"] for name, info in meta["columns"].items()}
+        print(f"{csv_path} -> {path}: {meta['rows']} rows, {size / 1e6:.1f} MB")
+        print(f"  {kinds}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
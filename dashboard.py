@@ -1,42 +1,16 @@
 import streamlit as st
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.pipeline import Pipeline
+
+import data_access
 
 st.title("🛍️ E-Commerce Return & Refund Fraud Analytics")
 st.write("Enter return / refund details and get fraud risk instantly.")
 
-# ---------- LOAD + TRAIN MODEL ----------
-@st.cache_resource
-def load_model():
-
-    # load dataset from repo
-    df = pd.read_csv("dataset.csv")
-
-    X = df.drop("is_fraud", axis=1)
-    y = df["is_fraud"]
-
-    categorical = ["product_category","payment_method","return_reason","refund_type"]
-    numeric = ["order_amount","past_returns","delivery_delay_days"]
-
-    preprocess = ColumnTransformer(
-        transformers=[
-            ("cat", OneHotEncoder(handle_unknown="ignore"), categorical),
-            ("num", "passthrough", numeric)
-        ]
-    )
-
-    model = Pipeline(steps=[
-        ("prep", preprocess),
-        ("model", RandomForestClassifier(n_estimators=150, random_state=42))
-    ])
-
-    model.fit(X, y)
-    return model
-
-model = load_model()
+# ---------- LOAD MODEL ----------
+# memory-mapped artifact from model_training.py (milliseconds, shared
+# page cache), else the pickled pipeline; shared by every session and
+# reloaded when model_training.py writes a different model
+model = data_access.load_model("fraud_model.pkl", "fraud_model.bin")
 
 # ---------- USER INPUT ----------
 order_amount = st.number_input("Order Amount (₹)", min_value=0)
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import columnar
+from model_artifact import file_version, load_artifact
+
+# -------------------------------------------------
+# SHARED DATASET / MODEL CACHE
+#
+# one process-wide cache for every entry point. Each access
+# stats the source files (no read); only when a stat changes
+# is the content hashed, and only a different hash reloads,
+# so a touch or an identical rewrite keeps what's cached.
+# Every session gets the same loaded frame: callers receive
+# a shallow copy, which shares the column buffers and, with
+# pandas copy-on-write (the default from pandas 3, which
+# requirements.txt pins), can be extended or modified
+# without touching the shared one
+# -------------------------------------------------
+
+HASH_BLOCK = 1 << 20
+
+_lock = threading.Lock()
+_entries = {}
+
+
+class _Entry:
+
+    def __init__(self):
+        self.lock = threading.Lock()   # one loader per key; other keys proceed
+        self.stats = None
+        self.digest = None
+        self.value = None
+        self.loads = 0
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _hash(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            with open(path, "rb") as fh:
+                for block in iter(lambda: fh.read(HASH_BLOCK), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def cached(key, sources, loader):
+    # -> (value, content digest); loader() runs on first use and again
+    #    whenever the content of `sources` changes
+    with _lock:
+        entry = _entries.setdefault(key, _Entry())
+
+    with entry.lock:
+        stats = [_stat(path) for path in sources]
+        if stats != entry.stats:
+            digest = _hash(sources)
+            if digest != entry.digest:
+                entry.value = loader()
+                entry.digest = digest
+                entry.loads += 1
+            entry.stats = stats
+        return entry.value, entry.digest
+
+
+def _name(fn):
+    # by name: a function defined in a Streamlit script is a new object every rerun
+    return None if fn is None else f"{fn.__module__}.{fn.__qualname__}"
+
+
+# -------------------------------------------------
+# DATASETS
+# -------------------------------------------------
+def _dataset_sources(path):
+    # the CSV and its columnar copy (which may be rebuilt on its own)
+    return [path, os.path.join(columnar.columns_path(path), columnar.META)]
+
+
+def _load(path, columns, decode, prepare, skip_missing):
+    columns = None if columns is None else list(columns)   # None = all, [] = none
+
+    def load():
+        wanted = columns
+        if columns is not None and skip_missing:
+            available = columnar.table_columns(path)
+            wanted = [c for c in columns if c in available]
+        df = columnar.read_table(path, wanted, decode)
+        return prepare(df) if prepare is not None else df
+
+    projection = None if columns is None else tuple(columns)
+    key = ("dataset", os.path.abspath(path), projection, decode, _name(prepare), skip_missing)
+    value, _ = cached(key, _dataset_sources(path), load)
+    return value
+
+
+def load_dataset(path, columns=None, decode=False, prepare=None, skip_missing=False):
+    # columns: projection (skip_missing drops the ones the file lacks)
+    # prepare: df -> df, applied once per load and shared like the frame
+    return _load(path, columns, decode, prepare, skip_missing).copy(deep=False)
+
+
+def load_prepared(path, prepare, columns=None, decode=False, skip_missing=False):
+    # whatever prepare(df) builds (e.g. a frame plus its indexes), once per
+    # content version; handed out as-is to every caller, so treat it as read-only
+    return _load(path, columns, decode, prepare, skip_missing)
+
+
+def dataset_version(path):
+    # content digest of the dataset, e.g. as a cache key for derived results
+    _, digest = cached(("version", os.path.abspath(path)), _dataset_sources(path), lambda: None)
+    return digest
+
+
+# -------------------------------------------------
+# MODELS
+# -------------------------------------------------
+def load_model(path="fraud_model.pkl", artifact_path="fraud_model.bin"):
+    # memory-mapped artifact when it was built from this pickle, else the pickle
+    def load():
+        if os.path.exists(artifact_path):
+            artifact = load_artifact(artifact_path)
+            if artifact.version == file_version(path):
+                return artifact
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+    key = ("model", os.path.abspath(path), os.path.abspath(artifact_path))
+    model, _ = cached(key, [path, artifact_path], load)
+    return model
+
+
+def stats():
+    with _lock:
+        return [
+            {"key": key, "digest": entry.digest, "loads": entry.loads}
+            for key, entry in _entries.items()
+        ]
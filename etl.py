@@ -0,0 +1,151 @@
+import argparse
+import collections
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar
+from add_risk_data import add_risk
+from prepare_dataset import REQUIRED, map_columns, select_required
+
+# -------------------------------------------------
+# CHUNKED ETL: raw export -> dataset_clean.csv
+#
+# prepare_dataset.py + add_risk_data.py for files of any
+# size. The column mapping (prepare_dataset.SOURCES, or
+# --column TARGET=SOURCE) is resolved once from the header;
+# the parent only splits the input into blocks of lines,
+# and each block is parsed, cleaned, labelled and rendered
+# back to CSV text (in-process or on a worker pool). Blocks
+# are written in input order with at most 2 x workers in
+# flight, so memory is set by --chunk-size, not file size.
+# Block i draws from its own child of one SeedSequence, so
+# a given seed and chunk size give the same output for any
+# number of workers. The same blocks also go, dictionary
+# encoded, into the columnar copy (<dst>.cols, see columnar.py)
+#
+# python etl.py dataset.csv dataset_clean.csv --workers 4
+# -------------------------------------------------
+
+OUTPUT_COLUMNS = REQUIRED + ["risk"]
+OUTPUT_CATEGORICAL = ["product_category", "payment_method", "return_reason", "refund_type", "risk"]
+OUTPUT_DTYPES = {
+    "order_amount": "<f8",
+    "past_returns": "<f8",
+    "delivery_delay_days": "<f8",
+    "is_fraud": "i1",
+}
+
+
+def resolve_columns(header, overrides=None):
+    # -> {source column: required column}; raises if a required one has no source
+    return map_columns(header, overrides)
+
+
+def read_blocks(fh, chunk_size):
+    # raw text blocks of ~chunk_size records; a block never ends inside a
+    # quoted field (an odd number of quotes means a record spans lines)
+    while True:
+        block = "".join(itertools.islice(fh, chunk_size))
+        if not block:
+            return
+        while block.count('"') % 2:
+            line = fh.readline()
+            if not line:
+                break
+            block += line
+        yield block
+
+
+def clean_block(task):
+    block, header, mapping, seed = task
+    df = pd.read_csv(io.StringIO(block), header=None, names=header, usecols=list(mapping) or None)
+    df = select_required(df.rename(columns=mapping))
+    df = add_risk(df, seed)[OUTPUT_COLUMNS]
+    return df.to_csv(header=False, index=False), columnar.encode(df), len(df)
+
+
+def imap_bounded(pool, fn, tasks, depth):
+    # like pool.imap, but reads at most `depth` tasks ahead of the consumer
+    inflight = collections.deque()
+    for task in tasks:
+        inflight.append(pool.apply_async(fn, (task,)))
+        if len(inflight) >= depth:
+            yield inflight.popleft().get()
+    while inflight:
+        yield inflight.popleft().get()
+
+
+def run(src, dst, chunk_size=200_000, workers=1, seed=None, columns=None):
+    # -> (rows written, seed entropy); columns = {target: source column} overrides
+    root = np.random.SeedSequence(seed)
+    tmp = dst + ".tmp"
+    rows = 0
+
+    with open(src, newline="") as fh:
+        header = next(csv.reader([fh.readline()]))
+        mapping = resolve_columns(header, columns)
+        writer = columnar.ColumnWriter(columnar.columns_path(dst), OUTPUT_CATEGORICAL, OUTPUT_DTYPES)
+
+        tasks = (
+            (block, header, mapping, np.random.SeedSequence(root.entropy, spawn_key=(i,)))
+            for i, block in enumerate(read_blocks(fh, chunk_size))
+        )
+
+        pool = multiprocessing.Pool(workers) if workers > 1 else None
+        try:
+            if pool is None:
+                results = map(clean_block, tasks)
+            else:
+                results = imap_bounded(pool, clean_block, tasks, 2 * workers)
+
+            with open(tmp, "w", newline="") as out:
+                out.write(",".join(OUTPUT_COLUMNS) + "\n")
+                for text, encoded, n in results:
+                    out.write(text)
+                    writer.write(encoded, n)
+                    rows += n
+        except Exception:
+            writer.abort()
+            raise
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    os.replace(tmp, dst)
+    writer.close(source=dst)
+    return rows, root.entropy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean and risk-label a raw export in chunks")
+    parser.add_argument("src", nargs="?", default="dataset.csv")
+    parser.add_argument("dst", nargs="?", default="dataset_clean.csv")
+    parser.add_argument("--chunk-size", type=int, default=200_000, help="rows per block")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, help="default: fresh entropy (printed)")
+    parser.add_argument("--column", action="append", default=[], metavar="TARGET=SOURCE",
+                        help="source column for a target, overriding prepare_dataset.SOURCES")
+    args = parser.parse_args(argv)
+
+    columns = {}
+    for spec in args.column:
+        target, sep, source = spec.partition("=")
+        if not sep or target not in REQUIRED:
+            parser.error(f"--column takes TARGET=SOURCE with TARGET one of {', '.join(REQUIRED)}")
+        columns[target] = source
+
+    try:
+        rows, seed = run(args.src, args.dst, args.chunk_size, args.workers, args.seed, columns)
+    except ValueError as e:
+        parser.exit(2, f"etl: {e}\n")
+    print(f"✔ CLEAN DATA READY {rows} rows -> {args.dst} (seed {seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import fcntl
+import json
+import os
+import struct
+import sys
+from contextlib import contextmanager
+
+# -------------------------------------------------
+# APPEND-ONLY LIVE EVENT STORE (replaces live_stream.json)
+#
+#   <dir>/events-<base offset>.seg   u32 length | JSON record, ...
+#   <dir>/events-<base offset>.idx   u64 byte position per record
+#   <dir>/LOCK                       flock()ed by appenders
+#
+# an event's offset is its sequence number in the store.
+# Appenders write the record, then its index entry, under
+# an exclusive flock, so any number of processes can append.
+# Readers take no lock: the index length says how many
+# records are complete, and read_since(offset) jumps straight
+# to them. Segments roll over at max_segment_bytes
+# -------------------------------------------------
+
+LENGTH = struct.Struct("<I")
+POSITION = struct.Struct("<Q")
+SEG_SUFFIX = ".seg"
+IDX_SUFFIX = ".idx"
+
+
+class EventStore:
+
+    def __init__(self, directory="live_events", max_segment_bytes=16 << 20):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    # ---------- layout ----------
+    def _path(self, base, suffix):
+        return os.path.join(self.directory, f"events-{base:020d}{suffix}")
+
+    def _bases(self):
+        return sorted(
+            int(name[7:-len(IDX_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith("events-") and name.endswith(IDX_SUFFIX)
+        )
+
+    def _count(self, base):
+        try:
+            return os.path.getsize(self._path(base, IDX_SUFFIX)) // POSITION.size
+        except FileNotFoundError:
+            return 0
+
+    def end_offset(self):
+        # offset the next appended event will get
+        bases = self._bases()
+        return bases[-1] + self._count(bases[-1]) if bases else 0
+
+    # ---------- writing ----------
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.directory, "LOCK"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, event):
+        return self.append_many([event])[0]
+
+    def append_many(self, events):
+        # returns the offsets assigned to `events`
+        with self._locked():
+            return self._append_locked(events)
+
+    def _append_locked(self, events):
+        payloads = [json.dumps(e, default=str).encode("utf-8") for e in events]
+
+        bases = self._bases()
+        base = bases[-1] if bases else 0
+        count = self._count(base)
+
+        seg_path = self._path(base, SEG_SUFFIX)
+        if count and os.path.getsize(seg_path) >= self.max_segment_bytes:
+            base, count = base + count, 0
+            seg_path = self._path(base, SEG_SUFFIX)
+
+        # a crashed appender may have left an unindexed record at the end of
+        # the segment; positions are taken from the file end, so it is never
+        # referenced
+        with open(seg_path, "ab") as seg:
+            position = seg.seek(0, os.SEEK_END)
+            index = bytearray()
+            for payload in payloads:
+                index += POSITION.pack(position)
+                seg.write(LENGTH.pack(len(payload)) + payload)
+                position += LENGTH.size + len(payload)
+
+        # publishing the index entries is what makes the records visible
+        with open(self._path(base, IDX_SUFFIX), "ab") as idx:
+            idx.write(bytes(index))
+
+        return list(range(base + count, base + count + len(payloads)))
+
+    def import_json(self, path):
+        # one-off migration of a live_stream.json list; only into an empty store
+        if not os.path.exists(path):
+            return 0
+
+        with self._locked():
+            if self.end_offset():
+                return 0
+            with open(path) as fh:
+                events = json.load(fh)
+            if events:
+                self._append_locked(events)
+
+        return len(events)
+
+    # ---------- reading ----------
+    def read_since(self, offset=0, limit=None):
+        # -> (events, next offset); pass next offset back in to only get new events
+        events = []
+        offset = max(offset, 0)
+
+        for base in self._bases():
+            count = self._count(base)
+            if offset >= base + count:
+                continue
+            if limit is not None and len(events) >= limit:
+                break
+
+            first = max(offset - base, 0)
+            last = count if limit is None else min(count, first + limit - len(events))
+
+            with open(self._path(base, IDX_SUFFIX), "rb") as idx:
+                idx.seek(first * POSITION.size)
+                raw = idx.read((last - first) * POSITION.size)
+            positions = [p for (p,) in POSITION.iter_unpack(raw)]
+
+            # one read covering the whole range, from the first record to the end of the last
+            with open(self._path(base, SEG_SUFFIX), "rb") as seg:
+                seg.seek(positions[-1])
+                (last_len,) = LENGTH.unpack(seg.read(LENGTH.size))
+                seg.seek(positions[0])
+                data = seg.read(positions[-1] + LENGTH.size + last_len - positions[0])
+
+            for p in positions:
+                start = p - positions[0]
+                (length,) = LENGTH.unpack_from(data, start)
+                events.append(json.loads(data[start + LENGTH.size:start + LENGTH.size + length]))
+
+            offset = base + last
+
+        return events, offset
+
+    def tail(self, n):
+        end = self.end_offset()
+        events, _ = self.read_since(max(end - n, 0))
+        return events, end
+
+
+if __name__ == "__main__":
+    # python event_store.py [live_events] [live_stream.json]
+    directory = sys.argv[1] if len(sys.argv) > 1 else "live_events"
+    store = EventStore(directory)
+
+    if len(sys.argv) > 2:
+        print(f"imported {store.import_json(sys.argv[2])} events from {sys.argv[2]}")
+
+    events, end = store.tail(5)
+    print(f"{end} events in {len(store._bases())} segments under {directory}/")
+    for offset, event in zip(range(end - len(events), end), events):
+        print(offset, event)
@@ -0,0 +1,147 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# DATAFRAME-FREE FEATURIZER
+# turns one JSON dict into the exact feature row the
+# fitted ColumnTransformer would produce (one-hot block
+# followed by the passthrough numeric block)
+# -------------------------------------------------
+
+CATEGORICAL = ["product_category", "payment_method", "return_reason", "refund_type"]
+NUMERIC = ["order_amount", "past_returns", "delivery_delay_days"]
+
+
+def to_float(value):
+    # same coercion pandas/sklearn apply to an object column
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return float(np.float32(value))
+    return float(value)
+
+
+class Featurizer:
+
+    def __init__(self, categories, numeric=NUMERIC):
+        # categories: [(column, [fitted values...]), ...] in encoder order
+        self.lookups = []
+        self.offsets = []
+        offset = 0
+
+        for col, values in categories:
+            self.lookups.append((col, {v: offset + i for i, v in enumerate(values)}))
+            self.offsets.append(offset)
+            offset += len(values)
+
+        self.categories = [(col, list(values)) for col, values in categories]
+        self.numeric = [(col, offset + i) for i, col in enumerate(numeric)]
+        self.n_features = offset + len(numeric)
+        self.n_onehot = offset
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, pipe):
+        prep = pipe.named_steps["prep"]
+        transformers = [t for t in prep.transformers_ if t[0] != "remainder"]
+
+        if [name for name, _, _ in transformers] != ["cat", "num"]:
+            raise ValueError("unsupported preprocessing layout")
+
+        _, encoder, cat_cols = transformers[0]
+        _, passthrough, num_cols = transformers[1]
+
+        if getattr(encoder, "drop", None) is not None:
+            raise ValueError("encoder with drop= is not supported")
+        if encoder.handle_unknown != "ignore":
+            raise ValueError("encoder must use handle_unknown='ignore'")
+        if getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("infrequent categories are not supported")
+        if passthrough != "passthrough" and type(passthrough).__name__ != "FunctionTransformer":
+            raise ValueError("numeric block must be passthrough")
+
+        categories = [
+            (col, [v for v in values]) for col, values in zip(cat_cols, encoder.categories_)
+        ]
+
+        return cls(categories, list(num_cols))
+
+    def _buffer(self):
+        # preallocated per-thread row, the flask server is threaded
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.n_features), dtype=np.float32)
+        return row
+
+    def fill(self, data, row):
+        row[: self.n_onehot] = 0
+
+        for col, lookup in self.lookups:
+            try:
+                idx = lookup.get(data.get(col))
+            except TypeError:
+                idx = None
+            if idx is not None:
+                row[idx] = 1.0
+
+        for col, idx in self.numeric:
+            row[idx] = to_float(data.get(col))
+
+        return row
+
+    def transform_one(self, data):
+        row = self._buffer()
+        self.fill(data, row[0])
+        return row
+
+    def transform_many(self, records):
+        X = np.zeros((len(records), self.n_features), dtype=np.float32)
+        for i, rec in enumerate(records):
+            self.fill(rec, X[i])
+        return X
+
+    def codes(self, data):
+        # position of each categorical value in its vocabulary, -1 if unknown
+        out = []
+        for (col, lookup), offset in zip(self.lookups, self.offsets):
+            try:
+                idx = lookup.get(data.get(col))
+            except TypeError:
+                idx = None
+            out.append(-1 if idx is None else idx - offset)
+        return out
+
+    def numeric_row(self, data):
+        return np.array([[to_float(data.get(col)) for col, _ in self.numeric]], dtype=np.float32)
+
+    def codes_frame(self, df):
+        out = np.full((len(df), len(self.lookups)), -1, dtype=np.intp)
+
+        for g, (col, lookup) in enumerate(self.lookups):
+            idx = df[col].map(lookup).to_numpy(dtype=np.float64, na_value=np.nan)
+            hit = ~np.isnan(idx)
+            out[hit, g] = idx[hit].astype(np.intp) - self.offsets[g]
+
+        return out
+
+    def numeric_frame(self, df):
+        X = np.empty((len(df), len(self.numeric)), dtype=np.float32)
+        for i, (col, _) in enumerate(self.numeric):
+            X[:, i] = pd.to_numeric(df[col]).to_numpy(dtype=np.float64, na_value=np.nan)
+        return X
+
+    def transform_frame(self, df):
+        # vectorized version for batches that already sit in a DataFrame
+        X = np.zeros((len(df), self.n_features), dtype=np.float32)
+        rows = np.arange(len(df))
+        codes = self.codes_frame(df)
+
+        for g, offset in enumerate(self.offsets):
+            hit = codes[:, g] >= 0
+            X[rows[hit], codes[hit, g] + offset] = 1.0
+
+        X[:, self.n_onehot:] = self.numeric_frame(df)
+
+        return X
@@ -0,0 +1,262 @@
+import sys
+
+import numpy as np
+
+# -------------------------------------------------
+# FLAT-ARRAY RANDOM FOREST
+# every tree of a fitted RandomForestClassifier packed
+# into contiguous node arrays, evaluated for all trees
+# and all rows at once
+# -------------------------------------------------
+
+# rows per traversal block, keeps the (trees x rows) work arrays in cache
+CHUNK_ROWS = 256
+
+# APPROVE < 0.30 <= REVIEW < 0.70 <= BLOCK, is_fraud = prob > 0.5
+DECISION_BOUNDARIES = (0.30, 0.50, 0.70)
+
+# slack so float rounding of the bounds can never flip a band
+BOUND_EPS = 1e-9
+
+
+class FlatForest:
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 children=None, rest_min=None, rest_max=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_trees = len(roots)
+
+        # derived arrays may come precomputed (memory-mapped artifact)
+        if children is not None:
+            self.children = children
+            self.rest_min = rest_min
+            self.rest_max = rest_max
+            return
+
+        # interleaved (left, right) pairs: next = children[2 * node + go_right]
+        self.children = np.stack([left, right], axis=1).ravel()
+
+        # smallest / largest leaf value each tree can still contribute,
+        # rest_min[k] / rest_max[k] = sum over trees k..end
+        tree_min = np.zeros(self.n_trees)
+        tree_max = np.zeros(self.n_trees)
+        if self.n_trees:
+            tree_of_node = np.repeat(np.arange(self.n_trees), np.diff(np.append(roots, len(left))))
+            is_leaf = left == np.arange(len(left))
+            tree_min[:] = np.inf
+            tree_max[:] = -np.inf
+            np.minimum.at(tree_min, tree_of_node[is_leaf], value[is_leaf])
+            np.maximum.at(tree_max, tree_of_node[is_leaf], value[is_leaf])
+        self.rest_min = np.append(np.cumsum(tree_min[::-1])[::-1], 0.0)
+        self.rest_max = np.append(np.cumsum(tree_max[::-1])[::-1], 0.0)
+
+    @classmethod
+    def from_sklearn(cls, forest, positive_class=1):
+        if forest.n_outputs_ != 1:
+            raise ValueError("only single-output forests are supported")
+
+        pos = list(forest.classes_).index(positive_class)
+
+        feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            # leaves point at themselves so extra iterations are no-ops
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, ids, tree.children_right) + offset)
+
+            if hasattr(tree, "missing_go_to_left"):
+                missing_left.append(tree.missing_go_to_left.astype(bool))
+            else:
+                missing_left.append(np.zeros(n, dtype=bool))
+
+            # same normalisation DecisionTreeClassifier.predict_proba applies
+            counts = tree.value[:, 0, :]
+            normalizer = counts.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(counts[:, pos] / normalizer)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(feature).astype(np.intp),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(left).astype(np.intp),
+            np.concatenate(right).astype(np.intp),
+            np.concatenate(missing_left),
+            np.concatenate(value).astype(np.float64),
+            np.asarray(roots, dtype=np.intp),
+            max_depth,
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (
+            self.feature, self.threshold, self.left, self.right,
+            self.missing_left, self.value, self.roots
+        ))
+
+    def leaves(self, X, roots=None):
+        # (n_trees, n_rows) leaf node ids
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        roots = self.roots if roots is None else roots
+        n_rows, n_cols = X.shape
+        flat = X.ravel()
+        base = (np.arange(n_rows) * n_cols)[None, :]
+        node = np.repeat(roots[:, None], n_rows, axis=1)
+        check_nan = np.isnan(flat).any()
+
+        for _ in range(self.max_depth):
+            x = flat.take(base + self.feature.take(node))
+            go_left = x <= self.threshold.take(node)
+            if check_nan:
+                go_left |= np.isnan(x) & self.missing_left.take(node)
+            node = self.children.take(2 * node + ~go_left)
+
+        return node
+
+    def predict_proba(self, X, chunk_size=CHUNK_ROWS):
+        # positive-class probability per row; trees are accumulated in
+        # order (cumsum never reorders) exactly like sklearn sums them
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        out = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            leaf_values = self.value.take(self.leaves(X[start:start + chunk_size]))
+            out[start:start + chunk_size] = np.cumsum(leaf_values, axis=0)[-1] / self.n_trees
+
+        return out
+
+    def predict_cascade(self, X, boundaries=DECISION_BOUNDARIES, max_error=None,
+                        block=16, chunk_size=CHUNK_ROWS):
+        # evaluate trees block by block and retire a row as soon as the
+        # trees left can no longer push its average across any boundary.
+        # with max_error set, a row also waits until the midpoint estimate
+        # is within max_error of the full-forest probability.
+        # returns (probability, trees_used)
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        prob = np.empty(len(X))
+        used = np.empty(len(X), dtype=np.intp)
+
+        for start in range(0, len(X), chunk_size):
+            end = start + chunk_size
+            prob[start:end], used[start:end] = self._cascade(
+                X[start:end], boundaries, max_error, block
+            )
+
+        return prob, used
+
+    def _cascade(self, X, boundaries, max_error, block):
+        n_rows = len(X)
+        prob = np.empty(n_rows)
+        used = np.empty(n_rows, dtype=np.intp)
+        total = np.zeros(n_rows)
+        active = np.arange(n_rows)
+
+        # no row can settle while the remaining trees could still move it
+        # by more than the widest gap between boundaries: jump straight there
+        widest = np.diff(np.concatenate([[0.0], sorted(boundaries), [1.0]])).max()
+        if max_error is not None:
+            widest = min(widest, 2 * max_error)
+        width = (self.rest_max - self.rest_min) / self.n_trees
+        stop = int(np.argmax(width < widest))
+
+        start = 0
+
+        while len(active):
+            stop = min(max(stop, start + 1), self.n_trees)
+            leaf_values = self.value.take(self.leaves(X[active], self.roots[start:stop]))
+
+            # running sum continued tree by tree, same order as predict_proba
+            acc = np.cumsum(np.vstack([total[active][None, :], leaf_values]), axis=0)[-1]
+            total[active] = acc
+
+            if stop == self.n_trees:
+                prob[active] = acc / self.n_trees
+                used[active] = stop
+                break
+
+            lo = (acc + self.rest_min[stop]) / self.n_trees
+            hi = (acc + self.rest_max[stop]) / self.n_trees
+
+            done = np.ones(len(active), dtype=bool)
+            for b in boundaries:
+                done &= (hi < b - BOUND_EPS) | (lo > b + BOUND_EPS)
+            if max_error is not None:
+                done &= (hi - lo) / 2 <= max_error
+
+            prob[active[done]] = (lo[done] + hi[done]) / 2
+            used[active[done]] = stop
+
+            active = active[~done]
+            start = stop
+            stop = start + block
+
+        return prob, used
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            missing_left=self.missing_left,
+            value=self.value,
+            roots=self.roots,
+            max_depth=np.asarray(self.max_depth),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            return cls(
+                z["feature"], z["threshold"], z["left"], z["right"],
+                z["missing_left"], z["value"], z["roots"], int(z["max_depth"]),
+            )
+
+
+def from_pipeline(pipe):
+    return FlatForest.from_sklearn(pipe.named_steps["model"])
+
+
+if __name__ == "__main__":
+    # export: python forest_engine.py [fraud_model.pkl] [fraud_model_forest.npz]
+    import pickle
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "fraud_model.pkl"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "fraud_model_forest.npz"
+
+    forest = from_pipeline(pickle.load(open(src, "rb")))
+    forest.save(dst)
+
+    print(f"✔ {forest.n_trees} trees / {forest.n_nodes} nodes -> {dst} ({forest.nbytes} bytes)")
@@ -1,54 +1,547 @@
-from flask import Flask, request, jsonify
-import pickle
+from flask import Flask, Response, request, jsonify, stream_with_context
+import hmac
+import json
+import os
+import signal
+import time
+import numpy as np
 import pandas as pd
 
+from featurizer import CATEGORICAL, NUMERIC
+from prediction_cache import PredictionCache, canonical_key
+from micro_batcher import MicroBatcher
+from model_store import COLUMNS, ModelStore
+from metrics import Counter, Gauges, Histogram, Registry
+from profiler import SamplingProfiler, merged_collapsed, merged_report
+from request_log import RequestLog
+from event_store import EventStore
+from live_feed import EventChannel
+from shared_ring import SharedRing
+
 app = Flask(__name__)
 
+MAX_BATCH_ROWS = 50000
+
+# "sklearn" = fitted estimator, "flat" = compiled flat-array forest,
+# "cascade" = flat forest that stops once the decision band is settled,
+# "specialized" = forest pre-evaluated per categorical combination
+ENGINE = os.environ.get("FRAUD_ENGINE", "sklearn")
+
+# cascade only: max |reported - full probability|, "none" = band only
+_max_error = os.environ.get("FRAUD_CASCADE_MAX_ERROR", "0.05")
+CASCADE_MAX_ERROR = None if _max_error.lower() == "none" else float(_max_error)
+
+# prediction cache: max entries (0 disables) and optional TTL in seconds
+CACHE_SIZE = int(os.environ.get("FRAUD_CACHE_SIZE", "10000"))
+_ttl = os.environ.get("FRAUD_CACHE_TTL", "")
+CACHE_TTL = float(_ttl) if _ttl else None
+
+# micro-batching of concurrent /predict calls (off unless FRAUD_MICROBATCH=1)
+MICROBATCH = os.environ.get("FRAUD_MICROBATCH", "0") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("FRAUD_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("FRAUD_BATCH_MAX_WAIT_MS", "2"))
+
+# above this many rows sklearn's compiled per-tree loop wins (see bench_forest.py)
+FLAT_MAX_ROWS = int(os.environ.get("FRAUD_FLAT_MAX_ROWS", "1000"))
+
+# specialized only: budget for building the tables in-process when the model
+# has no artifact carrying them (over budget = served by the flat engine)
+SPECIALIZE_MAX_MB = float(os.environ.get("FRAUD_SPECIALIZE_MAX_MB", "64"))
+SPECIALIZE_MAX_SECONDS = float(os.environ.get("FRAUD_SPECIALIZE_MAX_SECONDS", "10"))
+
+# models: newest *.pkl in FRAUD_MODEL_DIR (or FRAUD_MODEL), polled every
+# FRAUD_MODEL_POLL seconds (0 = only reload on POST /admin/reload)
+MODEL_PATH = os.environ.get("FRAUD_MODEL", "fraud_model.pkl")
+MODEL_DIR = os.environ.get("FRAUD_MODEL_DIR", "models")
+MODEL_POLL = float(os.environ.get("FRAUD_MODEL_POLL", "5"))
+ADMIN_TOKEN = os.environ.get("FRAUD_ADMIN_TOKEN", "")   # unset = /admin/* disabled
+
+# set by serve.py: the gunicorn master loads models and restarts the workers
+# (so they all serve one version and share it copy-on-write); None = this
+# process reloads by itself
+MASTER_PID = None
+
+# accepted sampling intervals for POST /admin/profiler
+PROFILER_MIN_MS = 1
+PROFILER_MAX_MS = 1000
+
+# request/decision log: binary segments under FRAUD_REQUEST_LOG ("" disables),
+# rotated at FRAUD_LOG_MAX_MB or FRAUD_LOG_MAX_AGE seconds
+REQUEST_LOG_DIR = os.environ.get("FRAUD_REQUEST_LOG", "logs")
+LOG_MAX_MB = float(os.environ.get("FRAUD_LOG_MAX_MB", "64"))
+LOG_MAX_AGE = float(os.environ.get("FRAUD_LOG_MAX_AGE", "3600"))
+LOG_FLUSH_INTERVAL = float(os.environ.get("FRAUD_LOG_FLUSH", "1.0"))
+
+# live /predict events for the dashboards: appended to the event store in
+# FRAUD_EVENT_DIR ("" disables) and pushed to GET /stream subscribers
+EVENT_DIR = os.environ.get("FRAUD_EVENT_DIR", "live_events")
+
+# every open /stream holds a server thread: at most FRAUD_STREAM_MAX per
+# process (more get 503), each closed after FRAUD_STREAM_MAX_SECONDS so
+# clients reconnect from their last id and the thread is handed back
+STREAM_MAX = int(os.environ.get("FRAUD_STREAM_MAX", "2"))
+STREAM_MAX_SECONDS = float(os.environ.get("FRAUD_STREAM_MAX_SECONDS", "300"))
+
+# the newest FRAUD_RECENT_ROWS scored events in shared memory segment
+# FRAUD_RECENT_SHM ("" disables), read directly by the dashboards
+RECENT_SHM = os.environ.get("FRAUD_RECENT_SHM", "fraud_recent")
+RECENT_ROWS = int(os.environ.get("FRAUD_RECENT_ROWS", "1024"))
+
+# metrics and profiler state of every worker pooled through files in
+# FRAUD_METRICS_DIR ("" = this process only); serve.py sets one per server
+METRICS_DIR = os.environ.get("FRAUD_METRICS_DIR", "")
+
+
+def decide(prob):
+    return (
+        "APPROVE"
+        if prob < 0.30
+        else "REVIEW REQUIRED"
+        if prob < 0.70
+        else "HIGH RISK - BLOCK"
+    )
+
+
+def batch_frame(data):
+    # accepts [{...}, ...], {"records": [...]} or {"columns": {name: [...]}}
+    if isinstance(data, dict) and "columns" in data:
+        cols = data["columns"]
+        n = len(next(iter(cols.values()), []))
+
+        for col, values in cols.items():
+            if len(values) != n:
+                raise ValueError(f"column '{col}' has {len(values)} values, expected {n}")
+
+        return pd.DataFrame({col: cols.get(col, [None] * n) for col in COLUMNS}, columns=COLUMNS)
+
+    records = data.get("records") if isinstance(data, dict) else data
+
+    if not isinstance(records, list):
+        raise ValueError("expected a list of records or a 'columns' mapping")
+
+    return pd.DataFrame(
+        [[rec.get(col) for col in COLUMNS] for rec in records],
+        columns=COLUMNS
+    )
+
+
 @app.route("/")
 def home():
-    return "Fraud API is running. Use POST request on /predict."
+    return "Fraud API is running. Use POST request on /predict or /predict_batch."
+
+# load trained model; every swap to a new version drops cached predictions
+cache = PredictionCache(CACHE_SIZE, CACHE_TTL)
+
+store = ModelStore(
+    MODEL_PATH,
+    model_dir=MODEL_DIR,
+    poll_interval=MODEL_POLL,
+    on_swap=lambda m: cache.set_version(m.version),
+    engine=ENGINE,
+    cascade_max_error=CASCADE_MAX_ERROR,
+    flat_max_rows=FLAT_MAX_ROWS,
+    specialize_max_mb=SPECIALIZE_MAX_MB,
+    specialize_max_seconds=SPECIALIZE_MAX_SECONDS,
+)
+
+
+@app.before_request
+def start_watcher():
+    if MASTER_PID is None:
+        store.ensure_watcher()
+    registry.ensure_sync()
+
+
+def predict_records(records):
+    model = store.current
+    df = pd.DataFrame([[rec.get(col) for col in COLUMNS] for rec in records], columns=COLUMNS)
+    probs, trees_used = model.predict_many(df)
+
+    if trees_used is None:
+        return [(p, None, model.version) for p in probs]
+    return [(p, int(u), model.version) for p, u in zip(probs, trees_used)]
+
+
+batcher = MicroBatcher(predict_records, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if MICROBATCH else None
+
+request_log = RequestLog(
+    REQUEST_LOG_DIR,
+    max_bytes=int(LOG_MAX_MB * 1024 * 1024),
+    max_age=LOG_MAX_AGE,
+    flush_interval=LOG_FLUSH_INTERVAL,
+) if REQUEST_LOG_DIR else None
+
+channel = EventChannel(
+    EventStore(EVENT_DIR), max_subscribers=STREAM_MAX, max_seconds=STREAM_MAX_SECONDS
+) if EVENT_DIR else None
+
+recent_ring = None
+
+
+def open_recent_ring():
+    # called by the serving entry point (serve.py's master before it forks the
+    # workers, or python fraud_api.py), never at import: importing the app
+    # for tests or tooling doesn't touch the running API's segment
+    global recent_ring
+    if RECENT_SHM and recent_ring is None:
+        recent_ring = SharedRing(RECENT_SHM, RECENT_ROWS)
+    return recent_ring
+
+
+# -------------------------------------------------
+# METRICS (whole server with FRAUD_METRICS_DIR)
+# -------------------------------------------------
+registry = Registry(METRICS_DIR or None)
+profiler = SamplingProfiler()
+registry.share("profiler", profiler.state)
+
+# POST /admin/profiler lands on one worker: it writes the action here and
+# every worker applies it within a sync interval (workers forked later too)
+PROFILER_CONTROL = os.path.join(METRICS_DIR, "profiler.ctl") if METRICS_DIR else None
+_profiler_control = {"applied": None}
+
+
+def apply_profiler(control):
+    if control["action"] == "start":
+        profiler.start(control["interval_ms"])
+    else:
+        profiler.stop()
+    _profiler_control["applied"] = control["id"]
+
+
+def broadcast_profiler(action, interval_ms=None):
+    control = {"id": time.time_ns(), "action": action, "interval_ms": interval_ms}
+    if PROFILER_CONTROL:
+        tmp = f"{PROFILER_CONTROL}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(control, fh)
+        os.replace(tmp, PROFILER_CONTROL)
+    apply_profiler(control)
+
+
+def follow_profiler():
+    try:
+        with open(PROFILER_CONTROL) as fh:
+            control = json.load(fh)
+    except (OSError, ValueError):
+        return
+    if control["id"] != _profiler_control["applied"]:
+        apply_profiler(control)
+
+
+if PROFILER_CONTROL:
+    registry.every_interval(follow_profiler)
+
+stage_seconds = registry.register(Histogram(
+    "fraud_stage_seconds", "Time spent per scoring stage", ("endpoint", "stage")
+))
+requests_total = registry.register(Counter(
+    "fraud_requests_total", "Scoring requests received", ("endpoint",)
+))
+errors_total = registry.register(Counter(
+    "fraud_errors_total", "Scoring requests that failed", ("endpoint",)
+))
+decisions_total = registry.register(Counter(
+    "fraud_decisions_total", "Scored rows per decision band", ("decision",)
+))
+registry.register(Gauges(
+    "fraud_cache", "Prediction cache counters", ("stat",),
+    lambda: [((k,), v) for k, v in cache.stats().items() if isinstance(v, (int, float)) and v is not None]
+))
+registry.register(Gauges(
+    "fraud_batcher", "Micro-batcher counters", ("stat",),
+    lambda: [] if batcher is None else [
+        ((k,), v) for k, v in batcher.stats().items() if isinstance(v, (int, float))
+    ]
+))
+registry.register(Gauges(
+    "fraud_request_log", "Request log writer counters", ("stat",),
+    lambda: [] if request_log is None else [
+        ((k,), v) for k, v in request_log.stats().items() if isinstance(v, (int, float))
+    ]
+))
+registry.register(Gauges(
+    "fraud_event_channel", "Live event channel counters", ("stat",),
+    lambda: [] if channel is None else [((k,), v) for k, v in channel.stats().items()]
+))
+registry.register(Gauges(
+    "fraud_model_info", "Live model version", ("version", "engine"),
+    lambda: [((store.current.version, store.current.engine), 1)]
+))
 
-# load trained model
-model = pickle.load(open("fraud_model.pkl", "rb"))
 
 @app.route("/predict", methods=["POST"])
 def predict():
+    requests_total.inc("predict")
+    t0 = time.perf_counter()
+
     try:
         data = request.json
+        t1 = time.perf_counter()
+        stage_seconds.observe(t1 - t0, "predict", "parse")
 
-        # enforce correct column order
-        columns = [
-            "order_amount",
-            "product_category",
-            "payment_method",
-            "return_reason",
-            "past_returns",
-            "delivery_delay_days",
-            "refund_type"
-        ]
+        key = canonical_key(data, CATEGORICAL, NUMERIC)
+        cached = cache.get(key)
+        t2 = time.perf_counter()
+        stage_seconds.observe(t2 - t1, "predict", "cache")
 
-        df = pd.DataFrame([[data.get(col) for col in columns]], columns=columns)
+        if cached is None:
+            if batcher is not None:
+                cached = batcher.submit(data)
+                stage_seconds.observe(time.perf_counter() - t2, "predict", "batched")
+            else:
+                model = store.current
+                features = model.featurize_one(data)
+                t3 = time.perf_counter()
+                stage_seconds.observe(t3 - t2, "predict", "featurize")
 
-        prob = model.predict_proba(df)[0][1]
-        label = int(prob > 0.5)
+                cached = model.infer_one(features) + (model.version,)
+                stage_seconds.observe(time.perf_counter() - t3, "predict", "inference")
+            cache.put(key, cached, cached[2])
 
-        decision = (
-            "APPROVE"
-            if prob < 0.30
-            else "REVIEW REQUIRED"
-            if prob < 0.70
-            else "HIGH RISK - BLOCK"
-        )
+        prob, trees_used, version = cached
+        label = int(prob > 0.5)
 
-        return jsonify({
+        result = {
             "fraud_probability": round(prob, 3),
             "is_fraud": label,
-            "decision": decision
-        })
+            "decision": decide(prob),
+            "model_version": version
+        }
+
+        if trees_used is not None:
+            result["trees_used"] = trees_used
+
+        decisions_total.inc(result["decision"])
+        elapsed = time.perf_counter() - t0
+        stage_seconds.observe(elapsed, "predict", "total")
+
+        if request_log is not None:
+            request_log.append(
+                "predict", data, [prob], [result["decision"]],
+                None if trees_used is None else [trees_used], version, elapsed * 1000
+            )
+
+        if channel is not None or recent_ring is not None:
+            event = dict(
+                {col: data.get(col) for col in COLUMNS},
+                is_fraud=label,
+                fraud_probability=result["fraud_probability"],
+                decision=result["decision"],
+                model_version=version,
+                ts=time.time()
+            )
+            if channel is not None:
+                channel.publish(event)
+            if recent_ring is not None:
+                recent_ring.append(event)
+
+        return jsonify(result)
 
     except Exception as e:
+        errors_total.inc("predict")
         return jsonify({"error": str(e)}), 400
 
 
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    requests_total.inc("predict_batch")
+    t0 = time.perf_counter()
+
+    try:
+        data = request.json
+        t1 = time.perf_counter()
+        stage_seconds.observe(t1 - t0, "predict_batch", "parse")
+
+        df = batch_frame(data)
+        t2 = time.perf_counter()
+        stage_seconds.observe(t2 - t1, "predict_batch", "dataframe")
+
+        if len(df) > MAX_BATCH_ROWS:
+            raise ValueError(f"batch too large ({len(df)} rows, max {MAX_BATCH_ROWS})")
+
+        model = store.current
+
+        if len(df) == 0:
+            probs, trees_used = np.empty(0), None
+        else:
+            # one vectorized forest evaluation for the whole batch
+            features = model.featurize_many(df)
+            t3 = time.perf_counter()
+            stage_seconds.observe(t3 - t2, "predict_batch", "featurize")
+
+            probs, trees_used = model.infer_many(features)
+            stage_seconds.observe(time.perf_counter() - t3, "predict_batch", "inference")
+
+        decisions = np.select(
+            [probs < 0.30, probs < 0.70],
+            ["APPROVE", "REVIEW REQUIRED"],
+            default="HIGH RISK - BLOCK"
+        )
+
+        result = {
+            "fraud_probability": np.round(probs, 3).tolist(),
+            "is_fraud": (probs > 0.5).astype(int).tolist(),
+            "decision": decisions.tolist(),
+            "count": len(df),
+            "model_version": model.version
+        }
+
+        if trees_used is not None:
+            result["trees_used"] = trees_used.tolist()
+
+        for decision, count in zip(*np.unique(decisions, return_counts=True)):
+            decisions_total.inc(str(decision), amount=int(count))
+        elapsed = time.perf_counter() - t0
+        stage_seconds.observe(elapsed, "predict_batch", "total")
+
+        if request_log is not None and len(df):
+            request_log.append(
+                "predict_batch", df, probs, decisions, trees_used, model.version, elapsed * 1000
+            )
+
+        return jsonify(result)
+
+    except Exception as e:
+        errors_total.inc("predict_batch")
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/cache")
+def cache_stats():
+    return jsonify(cache.stats())
+
+
+@app.route("/batcher")
+def batcher_stats():
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(batcher.stats(), enabled=True))
+
+
+@app.route("/request_log")
+def request_log_stats():
+    if request_log is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(request_log.stats(), enabled=True))
+
+
+@app.route("/stream")
+def stream():
+    # Server-Sent Events; ?since=<offset> (or Last-Event-ID) replays from there
+    if channel is None:
+        return jsonify({"error": "live events are disabled"}), 404
+
+    since = request.args.get("since", type=int)
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    offset = last_id + 1 if last_id is not None else since
+
+    if not channel.acquire():
+        return jsonify({"error": "too many open streams, retry shortly"}), 503, {"Retry-After": "5"}
+
+    response = Response(
+        stream_with_context(channel.stream(offset)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # runs however the stream ends, even if it never started
+    response.call_on_close(channel.release)
+    return response
+
+
+@app.route("/model")
+def model_info():
+    return jsonify(dict(store.current.info(), last_reload=store.last_reload))
+
+
+@app.route("/metrics")
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def admin_denied():
+    # -> error response, or None for a request carrying the admin token;
+    #    with no token configured the admin routes are off entirely
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "admin routes are disabled, set FRAUD_ADMIN_TOKEN"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "unauthorized"}), 403
+    return None
+
+
+@app.route("/admin/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    # POST {"action": "start", "interval_ms": 5} | {"action": "stop"}
+    # GET -> top stacks as JSON, ?format=collapsed for flamegraph tools
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        if body.get("action") == "start":
+            try:
+                interval_ms = float(body.get("interval_ms", 5))
+            except (TypeError, ValueError):
+                interval_ms = None
+            if interval_ms is None or not PROFILER_MIN_MS <= interval_ms <= PROFILER_MAX_MS:
+                return jsonify({
+                    "error": f"interval_ms must be a number from {PROFILER_MIN_MS} to {PROFILER_MAX_MS}"
+                }), 400
+            broadcast_profiler("start", interval_ms)
+        elif body.get("action") == "stop":
+            broadcast_profiler("stop")
+        else:
+            return jsonify({"error": "action must be 'start' or 'stop'"}), 400
+
+    # samples of every live worker, each a sync interval old at most
+    states = registry.sections("profiler")
+
+    if request.args.get("format") == "collapsed":
+        return Response(merged_collapsed(states), mimetype="text/plain")
+
+    try:
+        top = int(request.args.get("top", 20))
+    except ValueError:
+        top = 0
+    if top < 1:
+        return jsonify({"error": "top must be a positive integer"}), 400
+
+    return jsonify(merged_report(states, top))
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    denied = admin_denied()
+    if denied is not None:
+        return denied
+
+    # only pickles from the model directory (or the default file) — never arbitrary paths
+    path = (request.get_json(silent=True) or {}).get("path")
+    if path is not None:
+        real = os.path.realpath(path)
+        allowed = os.path.realpath(MODEL_DIR) + os.sep
+        if not (real.startswith(allowed) or real == os.path.realpath(MODEL_PATH)):
+            return jsonify({"error": f"{path} is outside {MODEL_DIR}/"}), 400
+        if not os.path.exists(real):
+            return jsonify({"error": f"{path} not found"}), 400
+        path = real
+
+    # pinned for every process (no path = back to the newest file)
+    store.pin(path)
+
+    if MASTER_PID is not None:
+        os.kill(MASTER_PID, signal.SIGHUP)
+        return jsonify({"status": "restarting workers", "current_version": store.current.version}), 202
+
+    if not store.reload(path):
+        return jsonify({"status": "already loading", "last_reload": store.last_reload}), 409
+
+    return jsonify({"status": "loading", "current_version": store.current.version}), 202
+
+
 if __name__ == "__main__":
+    # the reloader serves from a child process; the ring belongs to that one
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        open_recent_ring()
     app.run(debug=True)
@@ -1,15 +1,21 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.express as px
 
+import analytics
+import data_access
+
 st.set_page_config(page_title="Fraud Analytics Dashboard", layout="wide")
 
 st.title("🛍️ E-Commerce Fraud Detection Dashboard")
 
+DATASET = "dataset.csv"
+COLUMNS = ["order_amount", "product_category", "return_reason", "past_returns", "is_fraud"]
+
 # ---------- Load data ----------
+# only the columns used below; cached for the whole process and reloaded
+# when the file's content changes, not parsed again on every rerun
 try:
-    df = pd.read_csv("dataset.csv")
+    df = data_access.load_dataset(DATASET, COLUMNS, skip_missing=True)
     st.success("Dataset loaded successfully")
 except Exception as e:
     st.error(f"Failed to load dataset: {e}")
@@ -39,8 +45,7 @@ st.markdown("---")
 # ---------- Risk Segments ----------
 st.subheader("Risk Segments")
 
-df["risk"] = np.where(df["is_fraud"] == 1, "High",
-             np.where(df["past_returns"] >= 3, "Medium", "Low"))
+df["risk"] = analytics.risk_labels(df)
 
 risk_chart = df["risk"].value_counts().reset_index()
 risk_chart.columns = ["Risk", "Count"]
@@ -51,7 +56,7 @@ st.plotly_chart(fig, use_container_width=True)
 # ---------- Fraudulent Categories ----------
 st.subheader("Top Fraudulent Categories")
 
-fraud_cat = df[df["is_fraud"] == 1]["product_category"].value_counts()
+fraud_cat = analytics.fraud_by_category(df)
 
 if fraud_cat.empty:
     st.info("No fraudulent records found in dataset")
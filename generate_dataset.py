@@ -1,35 +1,118 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+
+import numpy as np
 import pandas as pd
-import random
+
+import columnar
+
+# -------------------------------------------------
+# SYNTHETIC DATASET GENERATOR
+#
+# every column is drawn as a NumPy array and the label
+# is a vectorized mask. Rows are produced in fixed-size
+# chunks, chunk i from its own child of one SeedSequence,
+# so the output depends only on (rows, chunk size, seed),
+# not on how many workers ran. Workers write their chunk
+# to a part file; the parent appends the parts in order,
+# so memory stays at a few chunks however many rows.
+# A columnar copy (columnar.py) is written afterwards
+#
+# python generate_dataset.py --rows 20000000 --workers 4 --seed 1
+# -------------------------------------------------
 
 categories = ["Electronics","Clothing","Footwear","Books","Cosmetics"]
 reasons = ["Wrong Size","Item Damaged","Not Delivered","Used then returned","Wrong Product","No reason"]
 payments = ["UPI","Card","COD"]
 refunds = ["Instant","Post"]
 
-rows = []
+COLUMNS = [
+    "order_amount","product_category","payment_method","return_reason",
+    "past_returns","delivery_delay_days","refund_type","is_fraud"
+]
 
-for i in range(50000):
-    amount = random.randint(300,7000)
-    past = random.randint(0,8)
-    delay = random.randint(0,5)
 
-    fraud = 1 if (amount>3500 and past>3) or random.random() < 0.15 else 0
+def pick(rng, labels, n):
+    # take from an object array: every row shares the same few str objects
+    return np.array(labels, dtype=object)[rng.integers(0, len(labels), n)]
 
-    rows.append([
-        amount,
-        random.choice(categories),
-        random.choice(payments),
-        random.choice(reasons),
-        past,
-        delay,
-        random.choice(refunds),
-        fraud
-    ])
 
-df = pd.DataFrame(rows, columns=[
-    "order_amount","product_category","payment_method","return_reason",
-    "past_returns","delivery_delay_days","refund_type","is_fraud"
-])
+def generate_chunk(rng, n):
+    amount = rng.integers(300, 7001, n)
+    past = rng.integers(0, 9, n)
+    delay = rng.integers(0, 6, n)
+
+    fraud = ((amount > 3500) & (past > 3)) | (rng.random(n) < 0.15)
+
+    return pd.DataFrame({
+        "order_amount": amount,
+        "product_category": pick(rng, categories, n),
+        "payment_method": pick(rng, payments, n),
+        "return_reason": pick(rng, reasons, n),
+        "past_returns": past,
+        "delivery_delay_days": delay,
+        "refund_type": pick(rng, refunds, n),
+        "is_fraud": fraud.astype(np.int8),
+    }, columns=COLUMNS)
+
+
+def _write_part(task):
+    path, seed, n = task
+    generate_chunk(np.random.default_rng(seed), n).to_csv(path, header=False, index=False)
+    return path
+
+
+def generate(path, rows, seed=None, chunk_size=1_000_000, workers=1):
+    # -> the seed entropy used (pass it back in to reproduce the file)
+    root = np.random.SeedSequence(seed)
+    sizes = [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+    tasks = [
+        (f"{path}.part{i:05d}", child, n)
+        for i, (child, n) in enumerate(zip(root.spawn(len(sizes)), sizes))
+    ]
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as out:
+        out.write(",".join(COLUMNS) + "\n")
+
+        if workers > 1:
+            pool = multiprocessing.Pool(workers)
+            parts = pool.imap(_write_part, tasks)
+        else:
+            pool = None
+            parts = map(_write_part, tasks)
+
+        try:
+            for part in parts:
+                with open(part) as fh:
+                    shutil.copyfileobj(fh, out)
+                os.remove(part)
+        finally:
+            if pool is not None:
+                pool.terminate()
+            for part, _, _ in tasks:
+                if os.path.exists(part):
+                    os.remove(part)
+
+    os.replace(tmp, path)
+    return root.entropy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic refund dataset")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--output", default="dataset.csv")
+    parser.add_argument("--seed", type=int, help="default: fresh entropy (printed)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    seed = generate(args.output, args.rows, args.seed, args.chunk_size, args.workers)
+    columnar.convert(args.output, args.chunk_size)
+    print(f"Dataset created ✔ {args.rows} rows -> {args.output} (seed {seed})")
+
 
-df.to_csv("dataset.csv", index=False)
-print("Dataset created ✔")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# -------------------------------------------------
+# INCREMENTAL LIVE AGGREGATES
+# running totals plus per-second ring buckets covering
+# the longest window; add() is O(1) per event and a
+# snapshot only sums the ring (fixed size), so refresh
+# cost doesn't depend on how much history there is
+# -------------------------------------------------
+
+WINDOWS = {"1m": 60, "5m": 300, "1h": 3600}
+BANDS = ["APPROVE", "REVIEW REQUIRED", "HIGH RISK - BLOCK", "UNKNOWN"]
+
+
+def band_of(event):
+    decision = event.get("decision")
+    if decision in BANDS:
+        return BANDS.index(decision)
+
+    prob = event.get("fraud_probability")
+    if prob is None:
+        return BANDS.index("UNKNOWN")
+    return 0 if prob < 0.30 else 1 if prob < 0.70 else 2
+
+
+class LiveAggregates:
+
+    def __init__(self, horizon=max(WINDOWS.values()), recent=50):
+        self.horizon = horizon
+        self._lock = threading.Lock()
+
+        self.offset = 0
+        self.count = 0
+        self.fraud = 0
+        self.bands = np.zeros(len(BANDS), dtype=np.int64)
+        self.recent = deque(maxlen=recent)
+
+        # slot i holds second `second[i]`; stale slots are reset on reuse
+        self.second = np.full(horizon, -1, dtype=np.int64)
+        self.slot_count = np.zeros(horizon, dtype=np.int64)
+        self.slot_fraud = np.zeros(horizon, dtype=np.int64)
+        self.slot_bands = np.zeros((horizon, len(BANDS)), dtype=np.int64)
+
+    def add(self, event):
+        fraud = int(bool(event.get("is_fraud")))
+        band = band_of(event)
+
+        self.count += 1
+        self.fraud += fraud
+        self.bands[band] += 1
+        self.recent.append(event)
+
+        ts = event.get("ts")
+        if ts is None:
+            return   # legacy events without a timestamp only count towards totals
+
+        sec = int(ts)
+        slot = sec % self.horizon
+        if self.second[slot] != sec:
+            if self.second[slot] > sec:
+                return   # older than the ring
+            self.second[slot] = sec
+            self.slot_count[slot] = 0
+            self.slot_fraud[slot] = 0
+            self.slot_bands[slot] = 0
+
+        self.slot_count[slot] += 1
+        self.slot_fraud[slot] += fraud
+        self.slot_bands[slot, band] += 1
+
+    def ingest(self, events, offset):
+        # events pushed by a subscriber; `offset` is the next one expected
+        with self._lock:
+            for event in events:
+                self.add(event)
+            self.offset = offset
+
+    def follow(self, store):
+        # fold in whatever was appended to the event store since the last call
+        with self._lock:
+            events, self.offset = store.read_since(self.offset)
+            for event in events:
+                self.add(event)
+            return self._snapshot(time.time())
+
+    def snapshot(self, now=None):
+        with self._lock:
+            return self._snapshot(time.time() if now is None else now)
+
+    def _snapshot(self, now):
+        now = int(now)
+
+        def summary(count, fraud, bands):
+            return {
+                "count": int(count),
+                "fraud": int(fraud),
+                "fraud_rate": fraud / count if count else 0.0,
+                "bands": {name: int(n) for name, n in zip(BANDS, bands) if n},
+            }
+
+        snap = {"offset": self.offset, "total": summary(self.count, self.fraud, self.bands)}
+
+        for name, seconds in WINDOWS.items():
+            live = (self.second > now - seconds) & (self.second <= now)
+            snap[name] = summary(
+                self.slot_count[live].sum(),
+                self.slot_fraud[live].sum(),
+                self.slot_bands[live].sum(axis=0),
+            )
+
+        snap["recent"] = list(self.recent)
+        return snap
+
+
+def window_rows(snap):
+    # one row per window, for st.dataframe
+    return [
+        dict(
+            {"window": name, "requests": snap[name]["count"],
+             "fraud rate %": round(snap[name]["fraud_rate"] * 100, 2)},
+            **{band: snap[name]["bands"].get(band, 0) for band in BANDS[:3]}
+        )
+        for name in list(WINDOWS) + ["total"]
+    ]
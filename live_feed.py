@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+from live_aggregates import LiveAggregates
+
+# -------------------------------------------------
+# LIVE PUB/SUB OVER SERVER-SENT EVENTS
+#
+# server: the API publish()es every scored event; a writer
+# thread appends them to the shared event store and wakes
+# the /stream generators, which send "id: <offset>" +
+# "data: <json>" frames. Generators also re-check the
+# store every poll seconds, so events scored by other
+# pre-forked workers arrive too. Each stream holds a
+# server thread: at most max_subscribers are open per
+# process, and each ends after max_seconds so clients
+# reconnect (resuming from their last id) and free it
+#
+# client: LiveFeed keeps one subscription per dashboard
+# process, folds events into LiveAggregates and calls
+# back the sessions that watch() it once something new
+# arrives (at most once per redraw_interval each), so an
+# idle session costs nothing (see live_panel.py)
+# -------------------------------------------------
+
+HEARTBEAT_SECONDS = 15.0
+
+
+class EventChannel:
+
+    def __init__(self, store, max_pending=10000, poll=0.5, max_subscribers=2, max_seconds=300.0):
+        self.store = store
+        self.max_pending = max_pending
+        self.poll = poll
+        self.max_subscribers = max_subscribers
+        self.max_seconds = max_seconds
+
+        self._cond = threading.Condition()
+        self._pending = []
+        self._pid = None
+        self.generation = 0
+
+        self.published = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self.subscribers = 0
+        self.rejected = 0
+
+    def _ensure_writer(self):
+        # started lazily and restarted after fork: threads don't survive fork()
+        if self._pid == os.getpid():
+            return
+
+        with self._cond:
+            if self._pid != os.getpid():
+                self._pending = []
+                threading.Thread(target=self._run, name="event-channel", daemon=True).start()
+                self._pid = os.getpid()
+
+    def publish(self, event):
+        self._ensure_writer()
+
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(event)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                events, self._pending = self._pending, []
+
+            try:
+                self.store.append_many(events)
+                self.published += len(events)
+            except Exception:
+                self.write_errors += 1
+
+            with self._cond:
+                self.generation += 1
+                self._cond.notify_all()
+
+    def acquire(self):
+        # -> False when max_subscribers streams are already open; else the
+        #    caller streams and calls release() once the response is closed
+        with self._cond:
+            if self.subscribers >= self.max_subscribers:
+                self.rejected += 1
+                return False
+            self.subscribers += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def stream(self, offset=None, batch=500):
+        # generator of SSE frames, starting at `offset` (default: only new events),
+        # ending after max_seconds
+        offset = self.store.end_offset() if offset is None else offset
+        last_sent = time.monotonic()
+        deadline = last_sent + self.max_seconds
+
+        yield "retry: 1000\n\n"
+
+        while time.monotonic() < deadline:
+            generation = self.generation
+            events, next_offset = self.store.read_since(offset, limit=batch)
+
+            if events:
+                yield "".join(
+                    f"id: {offset + i}\ndata: {json.dumps(event, default=str)}\n\n"
+                    for i, event in enumerate(events)
+                )
+                offset = next_offset
+                last_sent = time.monotonic()
+                continue
+
+            if time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+
+            # woken by this worker's writer; the timeout picks up other workers' events
+            with self._cond:
+                self._cond.wait_for(lambda: self.generation != generation, self.poll)
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "write_errors": self.write_errors,
+            "subscribers": self.subscribers,
+            "rejected": self.rejected,
+            "end_offset": self.store.end_offset(),
+        }
+
+
+class LiveFeed:
+
+    def __init__(self, api_url, store=None, recent=50, reconnect_delay=1.0, history=None,
+                 redraw_interval=0.5):
+        self.url = f"{api_url}/stream"
+        self.reconnect_delay = reconnect_delay
+        self.redraw_interval = redraw_interval
+        self.aggregates = LiveAggregates(recent=recent)
+        self.history = history   # optional ring_buffer.ColumnarRing of recent events
+
+        self._cond = threading.Condition()
+        self.version = 0
+        self.connected = False
+        self.error = None
+        self._watchers = {}
+
+        # history comes straight from disk; the subscription resumes after it
+        if store is not None:
+            events, offset = store.read_since(0)
+            self._ingest(events, offset)
+
+        threading.Thread(target=self._run, name="live-feed", daemon=True).start()
+        threading.Thread(target=self._notify, name="live-feed-notify", daemon=True).start()
+
+        # give the first render a connected feed when the API is up
+        with self._cond:
+            self._cond.wait_for(lambda: self.connected or self.error, 2.0)
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self._subscribe()
+                # the API ends every stream after a while: resume straight away
+                if time.monotonic() - started >= self.reconnect_delay:
+                    continue
+                error = "stream closed"
+            except Exception as e:
+                error = str(e)
+
+            self._set_connected(False, error)
+            time.sleep(self.reconnect_delay)
+
+    def _subscribe(self):
+        params = {"since": self.aggregates.offset}
+        read_timeout = HEARTBEAT_SECONDS * 4
+
+        with requests.get(self.url, params=params, stream=True, timeout=(3, read_timeout)) as res:
+            res.raise_for_status()
+
+            self._set_connected(True, None)
+
+            event_id, data = None, []
+
+            # chunk_size=None: hand over each chunk as it arrives instead of filling a buffer
+            for line in res.iter_lines(chunk_size=None, decode_unicode=True):
+                if line.startswith("id:"):
+                    event_id = int(line[3:])
+                elif line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+                elif not line and data:
+                    self._deliver(event_id, json.loads("\n".join(data)))
+                    event_id, data = None, []
+
+    def _set_connected(self, connected, error):
+        # a change of connection state is news to waiting sessions too
+        with self._cond:
+            if connected != self.connected:
+                self.version += 1
+            self.connected = connected
+            self.error = error
+            self._cond.notify_all()
+
+    def _ingest(self, events, offset):
+        self.aggregates.ingest(events, offset)
+        if self.history is not None:
+            self.history.extend(events)
+
+    def _deliver(self, offset, event):
+        self._ingest([event], offset + 1)
+
+        with self._cond:
+            self.version += 1
+            self._cond.notify_all()
+
+    def watch(self, key, version, callback):
+        # callback() runs on the notifier thread once the feed moves past
+        # `version`; it returns False when the watcher is gone for good
+        with self._cond:
+            self._watchers[key] = (version, callback)
+            self._cond.notify_all()
+
+    def unwatch(self, key):
+        with self._cond:
+            self._watchers.pop(key, None)
+
+    def _notify(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: any(seen != self.version for seen, _ in self._watchers.values()))
+                version = self.version
+                due = [(key, callback) for key, (seen, callback) in self._watchers.items() if seen != version]
+                # called once per change; a watcher that redraws watch()es again
+                for key, callback in due:
+                    self._watchers[key] = (version, callback)
+
+            for key, callback in due:
+                try:
+                    alive = callback()
+                except Exception:
+                    alive = False
+                if not alive:
+                    self.unwatch(key)
+
+            # coalesce bursts: sessions redraw at most once per interval
+            time.sleep(self.redraw_interval)
+
+    def snapshot(self):
+        snap = self.aggregates.snapshot()
+        snap["connected"] = self.connected
+        snap["error"] = self.error
+        return snap
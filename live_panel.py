@@ -0,0 +1,110 @@
+import pandas as pd
+import streamlit as st
+
+from event_store import EventStore
+from live_feed import LiveFeed
+from ring_buffer import ColumnarRing
+from shared_ring import SharedRingReader
+
+# -------------------------------------------------
+# LIVE PANEL SHARED BY THE DASHBOARDS
+#
+# live_fragment() draws a panel in a fragment that is
+# rerun by the feed's notifier thread whenever the feed
+# moves (new event, connection up or down), at most once
+# per LiveFeed.redraw_interval. Nothing times it: a
+# session with nothing new runs nothing and is sent
+# nothing, and its elements stay as last drawn
+# -------------------------------------------------
+
+API_URL = "http://127.0.0.1:5000"
+EVENT_DIR = "live_events"
+RECENT_SHM = "fraud_recent"   # the API's shared-memory ring of recent events
+
+
+# one /stream subscription per dashboard process, shared by every session
+@st.cache_resource
+def open_feed(legacy_file=None, history_rows=0, history_columns=None):
+    store = EventStore(EVENT_DIR)
+    if legacy_file is not None:
+        store.import_json(legacy_file)
+
+    history = None
+    if history_rows:
+        history = ColumnarRing(history_rows, history_columns)
+
+    return LiveFeed(API_URL, store=store, history=history)
+
+
+# read straight out of the API's shared memory: no per-session parsing
+@st.cache_resource
+def recent_ring():
+    return SharedRingReader(RECENT_SHM)
+
+
+def recent_transactions(snap, n):
+    recent = recent_ring().recent(n)
+    if recent is None:   # API not running on this host: use the feed's copy
+        recent = pd.DataFrame(snap["recent"][-n:])
+    return recent
+
+
+def live_fragment(feed, render, key="live_panel", live=True):
+    # render(snap) draws the panel; with live=False it is drawn once per app run
+    @st.fragment(key=key)
+    def panel():
+        version = feed.version
+        session_id, rerun = _fragment_rerun(key)
+
+        if session_id is not None:
+            if live:
+                feed.watch(session_id, version, rerun)
+            else:
+                feed.unwatch(session_id)
+
+        snap = feed.snapshot()
+        if not snap["connected"]:
+            st.caption("Live feed not connected to the API, retrying…")
+
+        render(snap)
+
+    panel()
+
+
+def _fragment_rerun(key):
+    # -> (session id, callable rerunning fragment `key` of this session from
+    # any thread), or (None, None) outside a served app (e.g. AppTest).
+    # Streamlit has no public call for this, so the callable hands the server
+    # the same rerun message a run_every timer sends, on its event loop
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or not Runtime.exists():
+        return None, None
+
+    runtime = Runtime.instance()
+    loop = runtime._get_async_objs().eventloop
+    storage = ctx.fragment_storage
+    session_id = ctx.session_id
+
+    msg = BackMsg()
+    msg.rerun_script.query_string = ctx.query_string
+    msg.rerun_script.page_script_hash = ctx.page_script_hash
+    msg.rerun_script.is_auto_rerun = True
+
+    def send():
+        try:
+            msg.rerun_script.fragment_id = storage.resolve_target(key)[0]
+            runtime.handle_backmsg(session_id, msg)
+        except Exception:
+            pass   # fragment gone (full run pending) or server stopping
+
+    def rerun():
+        if not runtime.is_active_session(session_id):
+            return False
+        loop.call_soon_threadsafe(send)
+        return True
+
+    return session_id, rerun
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import platform
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from featurizer import CATEGORICAL, NUMERIC
+
+# -------------------------------------------------
+# ASYNC LOAD GENERATOR / REPLAY TOOL
+#
+# replays CSV rows against /predict (or /predict_batch)
+# over a pool of keep-alive HTTP/1.1 connections
+#
+#   open loop (--rate): request i is due at start + i/rate,
+#     whether or not earlier ones have finished; latency is
+#     measured from the due time, so a stalled server can't
+#     hide its queueing delay (coordinated omission)
+#   closed loop (--concurrency): N clients send back to back
+#
+# python load_generator.py --rate 500 --duration 30 --output run.json
+# -------------------------------------------------
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+# dataset.csv uses the raw export schema; same mapping as the dashboard's tab 3
+RAW_COLUMNS = {
+    "order_amount": "Product_Price",
+    "product_category": "Product_Category",
+    "payment_method": "Payment_Method",
+    "return_reason": "Return_Reason",
+    "delivery_delay_days": "Days_to_Return",
+}
+RAW_DEFAULTS = {"past_returns": 0, "refund_type": "Post"}
+
+
+def to_request(row):
+    if all(col in row for col in CATEGORICAL + NUMERIC):
+        return {col: row[col] or None for col in CATEGORICAL + NUMERIC}
+
+    record = dict(RAW_DEFAULTS)
+    for col, raw in RAW_COLUMNS.items():
+        record[col] = row.get(raw) or None
+    return record
+
+
+def iter_rows(path, loop=False):
+    # lazily, one CSV row at a time, mapped to a /predict payload
+    while True:
+        with open(path, newline="") as fh:
+            for row in csv.DictReader(fh):
+                yield to_request(row)
+        if not loop:
+            return
+
+
+def iter_payloads(path, batch_size, loop):
+    rows = iter_rows(path, loop)
+    if batch_size <= 1:
+        yield from rows
+        return
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield {"records": batch}
+
+
+# -------------------------------------------------
+# MINIMAL KEEP-ALIVE HTTP/1.1 CLIENT (stdlib only)
+# -------------------------------------------------
+class Connection:
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, path, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+
+        try:
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionError("connection closed by server")
+            status = int(status_line.split()[1])
+
+            length, close = None, False
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection" and value.strip().lower() == "close":
+                    close = True
+
+            if length is None:
+                await self.reader.read()
+                close = True
+            else:
+                await self.reader.readexactly(length)
+        except Exception:
+            self.close()
+            raise
+
+        if close:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+# -------------------------------------------------
+# RUNNERS
+# -------------------------------------------------
+class Recorder:
+
+    def __init__(self):
+        self.latency = []   # from the intended send time (CO-corrected in open loop)
+        self.service = []   # from the actual send time
+        self.errors = 0
+        self.status = {}
+
+    def record(self, due, sent, done, status):
+        self.latency.append(done - due)
+        self.service.append(done - sent)
+        self.status[status] = self.status.get(status, 0) + 1
+        if status != 200:
+            self.errors += 1
+
+
+async def send(pool, recorder, path, payload, due):
+    conn = await pool.get()
+    sent = time.perf_counter()
+    try:
+        status = await conn.request(path, json.dumps(payload).encode())
+    except Exception:
+        status = "error"
+    finally:
+        pool.put_nowait(conn)
+    recorder.record(due, sent, time.perf_counter(), status)
+
+
+async def open_loop(args, host, port, recorder):
+    pool = asyncio.Queue()
+    for _ in range(args.connections):
+        pool.put_nowait(Connection(host, port))
+
+    payloads = iter_payloads(args.csv, args.batch_size, loop=True)
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    tasks = set()
+
+    for i, payload in enumerate(payloads):
+        due = start + i * interval
+        if due - start >= args.duration:
+            break
+
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        task = asyncio.ensure_future(send(pool, recorder, args.path, payload, due))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.wait(tasks)
+    return time.perf_counter() - start
+
+
+async def closed_loop(args, host, port, recorder):
+    payloads = iter_payloads(args.csv, args.batch_size, loop=True)
+    start = time.perf_counter()
+    deadline = start + args.duration
+
+    async def client():
+        conn = Connection(host, port)
+        pool = asyncio.Queue()
+        pool.put_nowait(conn)
+        while time.perf_counter() < deadline:
+            now = time.perf_counter()
+            await send(pool, recorder, args.path, next(payloads), now)
+        conn.close()
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return time.perf_counter() - start
+
+
+def summarize(values):
+    if not values:
+        return {}
+    ms = np.asarray(values) * 1000
+    stats = {name: round(float(np.percentile(ms, q)), 3) for name, q in PERCENTILES.items()}
+    stats["mean"] = round(float(ms.mean()), 3)
+    stats["max"] = round(float(ms.max()), 3)
+    return stats
+
+
+def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    recorder = Recorder()
+
+    if args.rate:
+        elapsed = asyncio.run(open_loop(args, host, port, recorder))
+        mode = "open"
+    else:
+        elapsed = asyncio.run(closed_loop(args, host, port, recorder))
+        mode = "closed"
+
+    completed = len(recorder.latency)
+    rows = completed * max(args.batch_size, 1)
+
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+        "config": {
+            "mode": mode,
+            "url": args.url + args.path,
+            "rate": args.rate,
+            "concurrency": args.concurrency if mode == "closed" else args.connections,
+            "duration": args.duration,
+            "batch_size": args.batch_size,
+            "csv": args.csv,
+        },
+        "host": {"python": platform.python_version(), "machine": platform.machine()},
+        "requests": completed,
+        "errors": recorder.errors,
+        "status": {str(k): v for k, v in recorder.status.items()},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0,
+        # open loop: from the scheduled send time; closed loop: same as service
+        "latency_ms": summarize(recorder.latency),
+        "service_time_ms": summarize(recorder.service),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a CSV against the fraud API")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--csv", default="dataset.csv")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help=">1 sends {'records': [...]} to /predict_batch")
+    parser.add_argument("--rate", type=float, help="open loop: requests per second")
+    parser.add_argument("--connections", type=int, default=64,
+                        help="open loop: keep-alive connection pool size")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="closed loop: clients sending back to back")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    args.path = "/predict_batch" if args.batch_size > 1 else "/predict"
+
+    result = run(args)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+# -------------------------------------------------
+# LOW-OVERHEAD METRICS
+# fixed-bucket histograms and counters, rendered in
+# the Prometheus text exposition format
+#
+# with a shared directory (pre-fork serving) every
+# process writes its state to <dir>/<pid>.json each
+# interval and render() adds up all of them, so a
+# scrape landing on any worker covers the whole server.
+# counters of exited workers keep counting; gauges are
+# per live process, labelled with its pid
+# -------------------------------------------------
+
+# seconds: 50us .. 2.5s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def state(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+    def render(self, states=None):
+        # states: state() of every process to add up (None = this one)
+        values = {}
+        for state in [self.state()] if states is None else states:
+            for labels, value in state:
+                values[tuple(labels)] = values.get(tuple(labels), 0) + value
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def state(self):
+        with self._lock:
+            return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def render(self, states=None):
+        # states: state() of every process to add up (None = this one)
+        all_series = {}
+        for state in [self.state()] if states is None else states:
+            for labels, series in state:
+                total = all_series.setdefault(tuple(labels), [0] * (len(self.buckets) + 1) + [0.0])
+                for i, value in enumerate(series):
+                    total[i] += value
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+
+        for labels, series in sorted(all_series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+
+        return lines
+
+
+class Gauges:
+    # values pulled from a callback at scrape time: fn() -> [(labels, value), ...]
+
+    def __init__(self, name, help, labelnames, fn):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def state(self):
+        return [[list(labels), value] for labels, value in self.fn()]
+
+    def render(self, states=None):
+        # states: {pid: state()} of the live processes (None = this one, unlabelled)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+
+        if states is None:
+            for labels, value in self.fn():
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+            return lines
+
+        names = self.labelnames + ("pid",)
+        for pid, state in sorted(states.items()):
+            for labels, value in state:
+                lines.append(f"{self.name}{_labels(names, tuple(labels) + (pid,))} {_number(value)}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self, shared_dir=None, interval=1.0):
+        self.metrics = []
+        self.shared_dir = shared_dir
+        self.interval = interval
+        self._sections = {}   # name -> fn() -> JSON-able, shared with the metrics
+        self._hooks = []      # fn() run in every process each interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+        # created by the process that imports the app (the pre-fork master);
+        # files left by an earlier server in the same directory are dropped
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+            for path in glob.glob(os.path.join(shared_dir, "*")):
+                os.remove(path)
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def share(self, name, fn):
+        self._sections[name] = fn
+
+    def every_interval(self, fn):
+        self._hooks.append(fn)
+
+    def ensure_sync(self):
+        # lazily (re)started per process — threads don't survive fork()
+        if not self.shared_dir or self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._sync, name="metrics-sync", daemon=True).start()
+
+    def _sync(self):
+        while True:
+            time.sleep(self.interval)
+            for hook in self._hooks:
+                try:
+                    hook()
+                except Exception:
+                    pass
+            try:
+                self._write()
+            except OSError:
+                pass
+
+    def _write(self):
+        state = {
+            "at": time.time(),
+            "metrics": {m.name: m.state() for m in self.metrics},
+            "sections": {name: fn() for name, fn in self._sections.items()},
+        }
+        path = os.path.join(self.shared_dir, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, path)
+
+    def processes(self):
+        # -> {pid: (alive, state)} for every process that wrote its state,
+        # this one freshly written. Only the files are read, never this
+        # process's live values: each file only moves forward, so neither
+        # does any total built from them, whichever worker a scrape lands on
+        self._write()
+
+        processes = {}
+        for path in glob.glob(os.path.join(self.shared_dir, "*.json")):
+            pid = os.path.basename(path)[:-5]
+            try:
+                with open(path) as fh:
+                    state = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            processes[pid] = (_alive(int(pid)), state)
+        return processes
+
+    def sections(self, name):
+        # the named section of every live process (just this one when not shared)
+        if not self.shared_dir:
+            return [self._sections[name]()]
+        return [state["sections"][name] for alive, state in self.processes().values()
+                if alive and name in state["sections"]]
+
+    def render(self):
+        processes = self.processes() if self.shared_dir else None
+        lines = []
+        for metric in self.metrics:
+            if processes is None:
+                lines.extend(metric.render())
+            elif isinstance(metric, Gauges):
+                lines.extend(metric.render({
+                    pid: state["metrics"].get(metric.name, [])
+                    for pid, (alive, state) in processes.items() if alive
+                }))
+            else:
+                lines.extend(metric.render([
+                    state["metrics"].get(metric.name, []) for _, state in processes.values()
+                ]))
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# -------------------------------------------------
+# DYNAMIC MICRO-BATCHING
+# concurrent callers submit one item each; a worker
+# thread groups whatever arrives within max_wait_ms
+# (or up to max_batch_size items) into one call of
+# score_fn(items) -> results, in the same order
+# -------------------------------------------------
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_DELAY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+
+
+def _bucket(buckets, value):
+    for bound in buckets:
+        if value <= bound:
+            return bound
+    return "+Inf"
+
+
+class MicroBatcher:
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pid = None
+
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.failed_items = 0
+        self.batch_sizes = {b: 0 for b in BATCH_SIZE_BUCKETS + ["+Inf"]}
+        self.queue_delay = {b: 0 for b in QUEUE_DELAY_BUCKETS_MS + ["+Inf"]}
+        self.queue_delay_sum_ms = 0.0
+        self.queue_delay_max_ms = 0.0
+
+    def _ensure_worker(self):
+        # started lazily and restarted after fork: threads don't survive fork()
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, name="micro-batcher", daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, item, timeout=30.0):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+
+            try:
+                results = self.score_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"score_fn returned {len(results)} results for {len(items)} items")
+            except Exception:
+                # one bad item must not fail its neighbours: score them one by one
+                self.failed_batches += 1
+                results = None
+
+            for i, (item, future, queued) in enumerate(batch):
+                if results is not None:
+                    future.set_result(results[i])
+                    continue
+                try:
+                    result = self.score_fn([item])
+                    if len(result) != 1:
+                        raise ValueError(f"score_fn returned {len(result)} results for 1 item")
+                    future.set_result(result[0])
+                except Exception as e:
+                    self.failed_items += 1
+                    future.set_exception(e)
+
+            self._record(len(batch), [(started - queued) * 1000.0 for _, _, queued in batch])
+
+    def _record(self, size, delays_ms):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.batch_sizes[_bucket(BATCH_SIZE_BUCKETS, size)] += 1
+
+            for delay in delays_ms:
+                self.queue_delay[_bucket(QUEUE_DELAY_BUCKETS_MS, delay)] += 1
+                self.queue_delay_sum_ms += delay
+                self.queue_delay_max_ms = max(self.queue_delay_max_ms, delay)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "items": self.items,
+                "failed_batches": self.failed_batches,
+                "failed_items": self.failed_items,
+                "mean_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+                "batch_size_buckets": {str(k): v for k, v in self.batch_sizes.items()},
+                "queue_delay_ms_buckets": {str(k): v for k, v in self.queue_delay.items()},
+                "queue_delay_ms_mean": round(self.queue_delay_sum_ms / self.items, 4) if self.items else 0.0,
+                "queue_delay_ms_max": round(self.queue_delay_max_ms, 4),
+            }
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from featurizer import Featurizer
+from forest_engine import FlatForest
+from specialized_forest import ARRAYS as SPEC_ARRAYS
+from specialized_forest import SpecializedForest
+
+# -------------------------------------------------
+# MEMORY-MAPPED MODEL ARTIFACT (fraud_model.bin)
+#
+#   magic "FRAUDMDL" | format u32 | header length u32
+#   JSON header (vocabularies, feature order, decision
+#   thresholds, array table) padded to 64 bytes
+#   raw little-endian arrays, each 64-byte aligned
+#
+# loading maps the file read-only and wraps the arrays
+# in place: no unpickling, no copies, and every process
+# that maps the file shares the same page-cache pages.
+# The specialized-forest tables (spec_* arrays) are built
+# here, once, within a budget; a forest too large for it
+# is recorded as skipped and served by the flat engine
+# -------------------------------------------------
+
+MAGIC = b"FRAUDMDL"
+FORMAT = 1
+ALIGN = 64
+
+DECISION_THRESHOLDS = {"approve_below": 0.30, "review_below": 0.70, "fraud_above": 0.5}
+
+FOREST_ARRAYS = {
+    "feature": "<i8",
+    "threshold": "<f8",
+    "left": "<i8",
+    "right": "<i8",
+    "missing_left": "|b1",
+    "value": "<f8",
+    "roots": "<i8",
+    "children": "<i8",
+    "rest_min": "<f8",
+    "rest_max": "<f8",
+}
+
+
+# offline budget for the specialized tables (the API's in-process one is smaller)
+SPECIALIZE_MAX_MB = 512
+SPECIALIZE_MAX_SECONDS = 120
+
+
+def _pad(n):
+    return (-n) % ALIGN
+
+
+def save_artifact(pipe, path, version=None, specialize=True,
+                  max_mb=SPECIALIZE_MAX_MB, max_seconds=SPECIALIZE_MAX_SECONDS):
+    featurizer = Featurizer.from_pipeline(pipe)
+    forest = FlatForest.from_sklearn(pipe.named_steps["model"])
+
+    arrays = {name: np.ascontiguousarray(getattr(forest, name), dtype=dtype)
+              for name, dtype in FOREST_ARRAYS.items()}
+
+    specialized = None
+    if specialize:
+        try:
+            spec = SpecializedForest(forest, featurizer, max_mb, max_seconds)
+        except ValueError as e:
+            specialized = {"skipped": str(e)}
+        else:
+            specialized = spec.meta()
+            for name, arr in spec.arrays().items():
+                arrays[f"spec_{name}"] = np.ascontiguousarray(arr, dtype=SPEC_ARRAYS[name])
+
+    table = {}
+    offset = 0
+    for name, arr in arrays.items():
+        table[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    header = json.dumps({
+        "version": version,
+        "categories": [[col, [str(v) for v in values]] for col, values in featurizer.categories],
+        "numeric": [col for col, _ in featurizer.numeric],
+        "n_features": featurizer.n_features,
+        "n_trees": forest.n_trees,
+        "max_depth": forest.max_depth,
+        "thresholds": DECISION_THRESHOLDS,
+        "specialized": specialized,
+        "arrays": table,
+    }).encode("utf-8")
+
+    prefix = MAGIC + struct.pack("<II", FORMAT, len(header)) + header
+    prefix += b"\0" * _pad(len(prefix))
+
+    # write next to the target and rename, readers never see a partial file
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(prefix)
+        for arr in arrays.values():
+            fh.write(arr.tobytes())
+            fh.write(b"\0" * _pad(arr.nbytes))
+    os.replace(tmp, path)
+
+
+class ModelArtifact:
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "rb") as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buf = self._mmap
+        if buf[:8] != MAGIC:
+            raise ValueError(f"{path} is not a model artifact")
+
+        fmt, header_len = struct.unpack_from("<II", buf, 8)
+        if fmt != FORMAT:
+            raise ValueError(f"unsupported artifact format {fmt}")
+
+        start = 16 + header_len
+        self.header = json.loads(bytes(buf[16:start]).decode("utf-8"))
+        base = start + _pad(start)
+
+        arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            arrays[name] = np.frombuffer(
+                buf, dtype=dtype, count=count, offset=base + spec["offset"]
+            ).reshape(spec["shape"])
+
+        self.version = self.header.get("version")
+        self.thresholds = self.header["thresholds"]
+        self.featurizer = Featurizer(self.header["categories"], self.header["numeric"])
+        self.forest = FlatForest(
+            arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+            arrays["missing_left"], arrays["value"], arrays["roots"], self.header["max_depth"],
+            children=arrays["children"], rest_min=arrays["rest_min"], rest_max=arrays["rest_max"],
+        )
+
+        # None when not built (older artifact, or skipped: see specialize_error)
+        spec = self.header.get("specialized") or {}
+        self.specialize_error = spec.get("skipped")
+        self.specialized = None
+        if "spec_roots" in arrays:
+            self.specialized = SpecializedForest.from_arrays(
+                {name: arrays[f"spec_{name}"] for name in SPEC_ARRAYS}, spec
+            )
+
+    def predict_proba(self, df):
+        # sklearn-shaped (n, 2) output so it can stand in for the pipeline
+        p = self.forest.predict_proba(self.featurizer.transform_frame(df))
+        return np.column_stack([1.0 - p, p])
+
+
+def load_artifact(path="fraud_model.bin"):
+    return ModelArtifact(path)
+
+
+def file_version(path):
+    # version tag shared by the pickle and the artifact built from it
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()[:12]
+
+
+if __name__ == "__main__":
+    # python model_artifact.py [fraud_model.pkl] [fraud_model.bin]
+    import pickle
+    import time
+    import warnings
+
+    warnings.filterwarnings("ignore")
+
+    src = sys.argv[1] if len(sys.argv) > 1 else "fraud_model.pkl"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "fraud_model.bin"
+
+    start = time.perf_counter()
+    pipe = pickle.load(open(src, "rb"))
+    t_pickle = time.perf_counter() - start
+
+    save_artifact(pipe, dst, version=file_version(src))
+
+    start = time.perf_counter()
+    artifact = load_artifact(dst)
+    t_mmap = time.perf_counter() - start
+
+    print(f"✔ {dst} ({os.path.getsize(dst)} bytes, version {artifact.version})")
+    print(f"load: pickle {t_pickle * 1e3:.1f} ms  ->  mmap artifact {t_mmap * 1e3:.2f} ms")
+    if artifact.specialized is not None:
+        print(f"specialized tables: built in {artifact.header['specialized']['build_seconds']} s, "
+              f"{artifact.specialized.nbytes / 2**20:.1f} MB")
+    else:
+        print(f"specialized tables: skipped ({artifact.specialize_error})")
@@ -0,0 +1,352 @@
+import glob
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+from featurizer import Featurizer
+from forest_engine import FlatForest
+from model_artifact import file_version, load_artifact
+from specialized_forest import SpecializedForest
+
+# -------------------------------------------------
+# MODEL LOADING + ZERO-DOWNTIME HOT RELOAD
+# a ScoringModel is immutable once built; the store
+# loads and warms the next version in the background
+# and swaps the reference in one assignment, so every
+# request scores against exactly one complete model
+#
+# the version to serve is the newest pickle, unless the
+# pin file in the model directory names one (written by
+# pin(), e.g. for a rollback). Every process reads the
+# same pin file, so they all serve the same version
+# -------------------------------------------------
+
+PIN_FILE = "PINNED"   # in the model directory: a path, or empty = newest
+PIN_POLL = 1.0        # pin file check when new files aren't polled for
+
+COLUMNS = [
+    "order_amount",
+    "product_category",
+    "payment_method",
+    "return_reason",
+    "past_returns",
+    "delivery_delay_days",
+    "refund_type"
+]
+
+FOREST_ENGINES = ("flat", "cascade", "specialized")
+
+# scored once before a new model goes live
+WARM_SAMPLES = [
+    {"order_amount": 1200, "product_category": "Clothing", "payment_method": "UPI",
+     "return_reason": "Wrong Size", "past_returns": 0, "delivery_delay_days": 1, "refund_type": "Post"},
+    {"order_amount": 5400, "product_category": "Electronics", "payment_method": "COD",
+     "return_reason": "Not Delivered", "past_returns": 5, "delivery_delay_days": 0, "refund_type": "Instant"},
+    {"order_amount": 300, "product_category": "Books", "payment_method": "Card",
+     "return_reason": "Item Damaged", "past_returns": 2, "delivery_delay_days": 4, "refund_type": "Instant"},
+]
+
+
+def artifact_path_for(path):
+    return os.path.splitext(path)[0] + ".bin"
+
+
+class ScoringModel:
+
+    def __init__(self, path, engine="sklearn", artifact_path=None,
+                 cascade_max_error=0.05, flat_max_rows=1000,
+                 specialize_max_mb=64, specialize_max_seconds=10):
+        self.path = path
+        self.engine = engine
+        self.cascade_max_error = cascade_max_error
+        self.flat_max_rows = flat_max_rows
+        self.version = file_version(path)
+        self.loaded_at = time.time()
+
+        # the forest engines start from the memory-mapped artifact when it
+        # was built from this exact pickle (no unpickling at all)
+        artifact_path = artifact_path or artifact_path_for(path)
+        artifact = None
+        if engine in FOREST_ENGINES and os.path.exists(artifact_path):
+            artifact = load_artifact(artifact_path)
+            if artifact.version != self.version:
+                artifact = None
+
+        self.from_artifact = artifact is not None
+
+        if artifact is not None:
+            self.model = None
+            self.estimator = None
+            self.featurizer = artifact.featurizer
+            self.forest = artifact.forest
+
+        else:
+            self.model = pickle.load(open(path, "rb"))
+
+            # fast path: dict -> numpy row -> forest, skipping pandas/ColumnTransformer
+            try:
+                self.featurizer = Featurizer.from_pipeline(self.model)
+                self.estimator = self.model.named_steps["model"]
+            except (ValueError, KeyError, AttributeError):
+                self.featurizer = None
+                self.estimator = None
+
+            self.forest = None
+            if engine in FOREST_ENGINES and self.featurizer is not None:
+                self.forest = FlatForest.from_sklearn(self.estimator)
+
+        self.cascade = engine == "cascade" and self.forest is not None
+
+        # specialized tables come from the artifact (mapped, shared by every
+        # worker); without one they are built here within a smaller budget.
+        # A forest too large for either is scored by the flat engine
+        self.specialized = None
+        self.specialize_report = None
+        if engine == "specialized" and self.forest is not None:
+            start = time.perf_counter()
+            if artifact is not None and (artifact.specialized is not None or artifact.specialize_error):
+                self.specialized = artifact.specialized
+                error = artifact.specialize_error
+                source = "artifact"
+            else:
+                try:
+                    self.specialized = SpecializedForest(
+                        self.forest, self.featurizer, specialize_max_mb, specialize_max_seconds
+                    )
+                    error = None
+                except ValueError as e:
+                    error = str(e)
+                source = "built"
+
+            self.specialize_report = {
+                "source": source if self.specialized is not None else "flat fallback",
+                "seconds": round(time.perf_counter() - start, 3),
+                "mb": None if self.specialized is None else round(self.specialized.nbytes / 2**20, 2),
+                "error": error,
+            }
+
+    # scoring is split into featurize / infer so callers can time each stage;
+    # infer returns (probabilities, trees used) — trees used is None unless cascading
+    def featurize_one(self, data):
+        featurizer = self.featurizer
+
+        if self.specialized is not None:
+            return featurizer.codes(data), featurizer.numeric_row(data)
+
+        if featurizer is not None:
+            return featurizer.transform_one(data)
+
+        df = pd.DataFrame([[data.get(col) for col in COLUMNS]], columns=COLUMNS)
+        return self.model[:-1].transform(df)
+
+    def infer_one(self, features):
+        if self.specialized is not None:
+            return self.specialized.predict_one(*features), None
+
+        if self.cascade:
+            prob, used = self.forest.predict_cascade(features, max_error=self.cascade_max_error)
+            return prob[0], int(used[0])
+
+        if self.forest is not None:
+            return self.forest.predict_proba(features)[0], None
+
+        if self.estimator is not None:
+            return self.estimator.predict_proba(features)[0][1], None
+
+        return self.model[-1].predict_proba(features)[0][1], None
+
+    def predict_one(self, data):
+        return self.infer_one(self.featurize_one(data))
+
+    def featurize_many(self, df):
+        featurizer = self.featurizer
+
+        if self.specialized is not None:
+            return featurizer.codes_frame(df), featurizer.numeric_frame(df)
+
+        if featurizer is not None:
+            return featurizer.transform_frame(df)
+
+        return self.model[:-1].transform(df)
+
+    def infer_many(self, features):
+        if self.specialized is not None:
+            return self.specialized.predict_proba(*features), None
+
+        if self.cascade:
+            return self.forest.predict_cascade(features, max_error=self.cascade_max_error)
+
+        if self.forest is not None and (len(features) <= self.flat_max_rows or self.estimator is None):
+            return self.forest.predict_proba(features), None
+
+        if self.estimator is not None:
+            return self.estimator.predict_proba(features)[:, 1], None
+
+        return self.model[-1].predict_proba(features)[:, 1], None
+
+    def predict_many(self, df):
+        return self.infer_many(self.featurize_many(df))
+
+    def warm(self, samples=WARM_SAMPLES):
+        # exercise both paths; a model that can't score these never goes live
+        df = pd.DataFrame([[s.get(col) for col in COLUMNS] for s in samples], columns=COLUMNS)
+        probs, _ = self.predict_many(df)
+        singles = [self.predict_one(s)[0] for s in samples]
+
+        for p in list(probs) + singles:
+            if not (0.0 <= p <= 1.0):
+                raise ValueError(f"warm-up produced invalid probability {p}")
+
+    def info(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "engine": self.engine,
+            "from_artifact": self.from_artifact,
+            "loaded_at": self.loaded_at,
+            "specialized": self.specialize_report,
+        }
+
+
+class ModelStore:
+
+    def __init__(self, default_path, model_dir="models", poll_interval=5.0,
+                 on_swap=None, **model_options):
+        self.default_path = default_path
+        self.model_dir = model_dir
+        self.pin_path = os.path.join(model_dir, PIN_FILE)
+        self.poll_interval = poll_interval
+        self.on_swap = on_swap
+        self.model_options = model_options
+
+        # called by the watcher with the path to serve instead of reloading
+        # this process (serve.py: reload in the master and restart the workers)
+        self.on_change = None
+
+        self._load_lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._watcher_pid = None
+        self._seen = None
+
+        path = self.target()
+        self.current = ScoringModel(path, **model_options)
+        self._seen = self._state(path)
+        self.last_reload = {"status": "loaded", "version": self.current.version, "path": path, "at": time.time(),
+                            "specialized": self.current.specialize_report}
+
+        if self.on_swap is not None:
+            self.on_swap(self.current)
+
+    def newest(self):
+        # most recently written pickle in the model directory (or the default file)
+        candidates = glob.glob(os.path.join(self.model_dir, "*.pkl"))
+        if os.path.exists(self.default_path):
+            candidates.append(self.default_path)
+        if not candidates:
+            raise FileNotFoundError(f"no model found in {self.model_dir}/ or {self.default_path}")
+        return max(candidates, key=os.path.getmtime)
+
+    def pinned(self):
+        try:
+            with open(self.pin_path) as fh:
+                return fh.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def pin(self, path):
+        # path=None follows the newest file again; rewriting the pin file
+        # (even with the same content) makes every watcher re-check
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp = f"{self.pin_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(path or "")
+        os.replace(tmp, self.pin_path)
+
+    def target(self):
+        return self.pinned() or self.newest()
+
+    def _stamp(self, path):
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+
+    def _state(self, path):
+        # what the watcher compares: the pin file, and the target's file when polling
+        try:
+            st = os.stat(self.pin_path)
+            pin = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            pin = None
+        return (pin, self._stamp(path) if self.poll_interval > 0 else None)
+
+    def reload(self, path=None, wait=False):
+        # returns False if another load is already running
+        if not self._load_lock.acquire(blocking=False):
+            return False
+
+        thread = threading.Thread(target=self._reload, args=(path,), name="model-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _reload(self, path):
+        try:
+            path = path or self.target()
+
+            # whatever triggered this load is handled, the watcher needn't repeat it
+            self._seen = self._state(path)
+
+            if file_version(path) == self.current.version:
+                self.last_reload = {"status": "unchanged", "version": self.current.version, "path": path, "at": time.time()}
+                return
+
+            self.last_reload = {"status": "loading", "path": path, "at": time.time()}
+
+            model = ScoringModel(path, **self.model_options)
+            model.warm()
+
+            # single reference assignment: requests see the old or the new model, never a mix
+            self.current = model
+
+            if self.on_swap is not None:
+                self.on_swap(model)
+
+            self.last_reload = {"status": "loaded", "version": model.version, "path": path, "at": time.time(),
+                                "specialized": model.specialize_report}
+
+        except Exception as e:
+            self.last_reload = {"status": "failed", "error": str(e), "path": path, "at": time.time()}
+
+        finally:
+            self._load_lock.release()
+
+    def ensure_watcher(self):
+        # lazily (re)started per process — threads don't survive fork()
+        if self._watcher_pid == os.getpid():
+            return
+
+        with self._watch_lock:
+            if self._watcher_pid != os.getpid():
+                self._watcher_pid = os.getpid()
+                threading.Thread(target=self._watch, name="model-watcher", daemon=True).start()
+
+    def _watch(self):
+        # reacts to a rewritten pin file, and (poll_interval > 0) to a new or
+        # rewritten newest file unless a version is pinned
+        while True:
+            time.sleep(self.poll_interval if self.poll_interval > 0 else PIN_POLL)
+            try:
+                path = self.target()
+                state = self._state(path)
+                if state == self._seen:
+                    continue
+                if self.on_change is not None:
+                    self.on_change(path)
+                    self._seen = state
+                elif self.reload(path):
+                    self._seen = state
+            except (OSError, ValueError):
+                pass
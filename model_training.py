@@ -1,19 +1,25 @@
-import pandas as pd
 import pickle
+import hashlib
+import os
+import shutil
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 
-df = pd.read_csv("dataset.csv")
-
-X = df.drop("is_fraud", axis=1)
-y = df["is_fraud"]
+import data_access
+from model_artifact import save_artifact
 
 categorical = ["product_category","payment_method","return_reason","refund_type"]
 numeric = ["order_amount","past_returns","delivery_delay_days"]
 
+# columnar copy when current (no text parsing), else the CSV
+df = data_access.load_dataset("dataset.csv", categorical + numeric + ["is_fraud"], decode=True)
+
+X = df.drop("is_fraud", axis=1)
+y = df["is_fraud"]
+
 preprocess = ColumnTransformer(
     transformers=[
         ("cat", OneHotEncoder(handle_unknown="ignore"), categorical),
@@ -31,5 +37,22 @@ X_train, X_test, y_train, y_test = train_test_split(
 
 pipe.fit(X_train, y_train)
 
-pickle.dump(pipe, open("fraud_model.pkl", "wb"))
+blob = pickle.dumps(pipe)
+version = hashlib.sha1(blob).hexdigest()[:12]
+
+open("fraud_model.pkl", "wb").write(blob)
 print("MODEL SAVED ✔ fraud_model.pkl")
+
+# memory-mappable copy for fast cold starts (same version tag as the pickle)
+save_artifact(pipe, "fraud_model.bin", version=version)
+print("ARTIFACT SAVED ✔ fraud_model.bin")
+
+# versioned copy for the running API to hot-reload; the artifact goes first
+# and the pickle is renamed into place last, so the watcher never sees half a model
+os.makedirs("models", exist_ok=True)
+stem = os.path.join("models", f"fraud_model-{version}")
+shutil.copyfile("fraud_model.bin", f"{stem}.bin.tmp")   # same artifact, built once
+os.replace(f"{stem}.bin.tmp", f"{stem}.bin")
+open(f"{stem}.pkl.tmp", "wb").write(blob)
+os.replace(f"{stem}.pkl.tmp", f"{stem}.pkl")
+print(f"VERSION PUBLISHED ✔ {stem}.pkl")
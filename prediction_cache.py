@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+# -------------------------------------------------
+# BOUNDED LRU / TTL PREDICTION CACHE
+# keyed on the canonical feature tuple, tagged with
+# the model version it was computed against
+# -------------------------------------------------
+
+
+def canonical_key(data, categorical, numeric):
+    # categoricals as sent, numerics as floats so 100 / 100.0 / "100" collide
+    # and NaN folds into None (both featurize to NaN); returns None when the
+    # payload can't be cached (unhashable values)
+    key = []
+
+    for col in categorical:
+        value = data.get(col)
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            return None
+        key.append(value)
+
+    for col in numeric:
+        value = data.get(col)
+        try:
+            value = None if value is None else float(value)
+        except (TypeError, ValueError):
+            return None
+        key.append(None if value != value else value)
+
+    return tuple(key)
+
+
+class PredictionCache:
+
+    def __init__(self, maxsize=10000, ttl=None, version=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if key is None or self.maxsize <= 0:
+            return None
+
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored = entry
+            if self.ttl is not None and time.monotonic() - stored > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        if key is None or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            # a result computed against an older model must not land in the cache
+            if version is not None and version != self.version:
+                return
+
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def set_version(self, version):
+        # model changed -> everything cached so far is stale
+        with self._lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.invalidations += 1
+                self.version = version
+                self._data.clear()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
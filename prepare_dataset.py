@@ -1,67 +1,90 @@
 import pandas as pd
 
-df = pd.read_csv("dataset.csv")
+import columnar
 
-# ---- AUTO MAP COLUMNS ----
-mapping = {}
+# ---- REQUIRED OUTPUT COLUMNS ----
+REQUIRED = [
+    "order_amount",
+    "product_category",
+    "payment_method",
+    "return_reason",
+    "past_returns",
+    "delivery_delay_days",
+    "refund_type",
+    "is_fraud"
+]
 
-for col in df.columns:
-    c = col.lower()
 
-    if "amount" in c or "price" in c or "value" in c or "purchase" in c:
-        mapping[col] = "order_amount"
+# ---- SOURCE COLUMNS PER TARGET ----
+# matched by exact name (case-insensitive), first listed candidate present
+# wins: the clean schema itself, then the raw returns export
+SOURCES = {
+    "order_amount": ["order_amount", "Product_Price"],
+    "product_category": ["product_category", "Product_Category"],
+    "payment_method": ["payment_method", "Payment_Method"],
+    "return_reason": ["return_reason", "Return_Reason"],
+    "past_returns": ["past_returns"],
+    "delivery_delay_days": ["delivery_delay_days", "Days_to_Return"],
+    "refund_type": ["refund_type"],
+    "is_fraud": ["is_fraud"],
+}
 
-    elif "category" in c:
-        mapping[col] = "product_category"
+# targets the export may lack; add_risk_data.py labels these anyway
+DEFAULTS = {
+    "past_returns": 0,
+    "refund_type": "Instant",
+    "is_fraud": 0,
+}
 
-    elif "payment" in c:
-        mapping[col] = "payment_method"
 
-    elif "reason" in c:
-        mapping[col] = "return_reason"
+def map_columns(columns, overrides=None):
+    # -> {source column: target}; overrides = {target: source column}.
+    # A target with no source and no default raises instead of being
+    # filled with a made-up value
+    by_name = {str(col).lower(): col for col in columns}
+    mapping = {}
+    missing = []
 
-    elif "return" in c or "refund" in c:
-        mapping[col] = "past_returns"
+    for target, candidates in SOURCES.items():
+        if overrides and target in overrides:
+            candidates = [overrides[target]]
+            if str(overrides[target]).lower() not in by_name:
+                raise ValueError(f"column {overrides[target]!r} given for {target} is not in the input")
 
-    elif "delay" in c or "ship" in c or "delivery" in c:
-        mapping[col] = "delivery_delay_days"
+        source = next((by_name[c.lower()] for c in candidates if c.lower() in by_name), None)
+        if source is not None:
+            mapping[source] = target
+        elif target not in DEFAULTS:
+            missing.append(f"{target} (looked for {', '.join(candidates)})")
 
-    elif "fraud" in c or "label" in c or "target" in c:
-        mapping[col] = "is_fraud"
+    if missing:
+        raise ValueError("no source column for " + "; ".join(missing))
 
-df = df.rename(columns=mapping)
+    return mapping
+
+
+def prepare(df):
+    return select_required(df.rename(columns=map_columns(df.columns)))
 
-# ---- FORCE REQUIRED COLUMNS ----
-required = [
-    "order_amount",
-    "product_category",
-    "payment_method",
-    "return_reason",
-    "past_returns",
-    "delivery_delay_days",
-    "refund_type",
-    "is_fraud"
-]
 
-for col in required:
-    if col not in df.columns:
+def select_required(df):
+    # ---- FILL DEFAULTED COLUMNS ----
+    for col, value in DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = value
 
-        # sensible defaults
-        if col == "refund_type":
-            df[col] = "Instant"
+    return df[REQUIRED]
 
-        elif col == "return_reason":
-            df[col] = "Unknown"
 
-        elif col == "is_fraud":
-            df[col] = 0
+def main(src="dataset.csv", dst="dataset_clean.csv"):
+    df = prepare(pd.read_csv(src))
 
-        else:
-            df[col] = 0
+    df.to_csv(dst, index=False)
+    columnar.write_table(df, dst)
 
-df = df[required]
+    print("✔ CLEAN DATA READY")
+    print(df.head())
 
-df.to_csv("dataset_clean.csv", index=False)
 
-print("✔ CLEAN DATA READY")
-print(df.head())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# -------------------------------------------------
+# SAMPLING PROFILER
+# a background thread snapshots every other thread's
+# stack at a fixed interval; switched on and off at
+# runtime, no restart and no tracing overhead when off
+# -------------------------------------------------
+
+
+class SamplingProfiler:
+
+    def __init__(self, max_depth=40):
+        self.max_depth = max_depth
+        self.interval = 0.005
+        self.samples = 0
+        self.started_at = None
+        self._stacks = Counter()
+        self._running = threading.Event()
+        self._lock = threading.Lock()
+        self._data_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self, interval_ms=5.0):
+        if not interval_ms > 0:   # 0 would busy-spin, < 0 kills the sampler in sleep()
+            raise ValueError(f"interval_ms must be positive, got {interval_ms}")
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = interval_ms / 1000.0
+            with self._data_lock:
+                self.samples = 0
+                self._stacks = Counter()
+            self.started_at = time.time()
+            self._running.set()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return False
+            self._running.clear()
+        self._thread.join()
+        return True
+
+    def _run(self):
+        me = threading.get_ident()
+
+        while self._running.is_set():
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+
+                stacks.append(";".join(reversed(stack)))
+
+            with self._data_lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+            time.sleep(self.interval)
+
+    def state(self):
+        # JSON-able, so processes can pool their samples (see merged_report)
+        with self._data_lock:
+            return {
+                "running": self.running,
+                "interval_ms": self.interval * 1000.0,
+                "samples": self.samples,
+                "started_at": self.started_at,
+                "stacks": dict(self._stacks),
+            }
+
+    def collapsed(self):
+        return merged_collapsed([self.state()])
+
+    def report(self, top=20):
+        return merged_report([self.state()], top)
+
+
+def merge_states(states):
+    # one profile out of the state() of several processes
+    merged = {"running": False, "interval_ms": None, "samples": 0, "started_at": None,
+              "processes": len(states), "stacks": Counter()}
+    for state in states:
+        merged["running"] = merged["running"] or state["running"]
+        merged["interval_ms"] = merged["interval_ms"] or state["interval_ms"]
+        merged["samples"] += state["samples"]
+        if state["started_at"] is not None:
+            merged["started_at"] = min(merged["started_at"] or state["started_at"], state["started_at"])
+        merged["stacks"].update(state["stacks"])
+    return merged
+
+
+def merged_collapsed(states):
+    # flamegraph.pl / speedscope "collapsed" format
+    stacks = merge_states(states)["stacks"].most_common()
+    return "\n".join(f"{stack} {count}" for stack, count in stacks) + "\n"
+
+
+def merged_report(states, top=20):
+    merged = merge_states(states)
+    stacks = merged.pop("stacks").most_common(top)
+    return dict(merged, top=[{"stack": stack, "count": count} for stack, count in stacks])
@@ -1,52 +1,59 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
-import requests
-import time
-import random
 
-st.set_page_config(page_title="Real-Time Fraud Dashboard", layout="wide")
-
-API_URL = "http://127.0.0.1:5000/predict"
-
-# Load base dataset
-df = pd.read_csv("dataset.csv")
-
-st.title("📡 Real-Time Refund Fraud Monitoring")
+from live_panel import live_fragment, open_feed, recent_transactions
+from ring_buffer import CATEGORY
 
-placeholder = st.empty()
+st.set_page_config(page_title="Real-Time Fraud Dashboard", layout="wide")
 
-while True:
+# fixed-size typed history of scored events: memory stays flat however long
+# the dashboard runs, and the trend reads only the newest TREND_POINTS rows
+HISTORY_ROWS = 10000
+TREND_POINTS = 200
+HISTORY_COLUMNS = {
+    "ts": "f8",
+    "fraud_probability": "f4",
+    "is_fraud": "i1",
+    "decision": CATEGORY,
+    "order_amount": "f4",
+    "product_category": CATEGORY,
+}
 
-    # pick random row to simulate new transaction
-    row = df.sample(1).to_dict(orient="records")[0]
 
-    res = requests.post(API_URL, json=row)
-    result = res.json()
+# traffic comes from whatever calls /predict (e.g. python realtime_stream.py)
+feed = open_feed(history_rows=HISTORY_ROWS, history_columns=HISTORY_COLUMNS)
 
-    prob = result["fraud_probability"]
-    decision = result["decision"]
 
-    row["probability"] = prob
-    row["decision"] = decision
+st.title("📡 Real-Time Refund Fraud Monitoring")
 
-    df = pd.concat([df, pd.DataFrame([row])])
 
-    with placeholder.container():
+# redrawn only when the feed moves; every redraw is its own fragment run,
+# so the chart keeps one key
+def live_panel(snap):
+    decisions = feed.history.counts("decision")
 
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Total Requests", len(df))
-        col2.metric("Fraud Flags", len(df[df["decision"]=="HIGH RISK - BLOCK"]))
-        col3.metric("Review Queue", len(df[df["decision"]=="REVIEW REQUIRED"]))
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Requests", feed.history.appended)
+    col2.metric("Fraud Flags", decisions.get("HIGH RISK - BLOCK", 0))
+    col3.metric("Review Queue", decisions.get("REVIEW REQUIRED", 0))
 
-        st.markdown("---")
+    st.markdown("---")
 
+    if snap["recent"]:
         st.subheader("🔔 Latest Event")
-        st.json(row)
+        st.json(snap["recent"][-1])
 
         st.subheader("Fraud Trend")
-        line = px.line(df.tail(50), y="probability")
-        st.plotly_chart(line, use_container_width=True)
+        trend = pd.DataFrame(feed.history.last(TREND_POINTS, ["ts", "fraud_probability"]))
+        trend["ts"] = pd.to_datetime(trend["ts"], unit="s")
+        line = px.line(trend, x="ts", y="fraud_probability")
+        st.plotly_chart(line, use_container_width=True, key="trend")
+
+        st.subheader("Recent Transactions")
+        st.dataframe(recent_transactions(snap, 12))
+    else:
+        st.info("Waiting for scored requests...")
+
 
-    time.sleep(3)
+live_fragment(feed, live_panel)
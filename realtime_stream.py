@@ -1,13 +1,15 @@
-import pandas as pd
 import time
 import requests
 
-df = pd.read_csv("dataset.csv")
+from load_generator import iter_rows
 
-for i, row in df.iterrows():
-    data = row.drop("is_fraud").to_dict()
+# slow, human-readable replay for watching the dashboards;
+# use load_generator.py to actually stress the API
+session = requests.Session()   # one keep-alive connection for the whole replay
 
-    res = requests.post("http://127.0.0.1:5000/predict", json=data)
+for i, data in enumerate(iter_rows("dataset.csv")):
+
+    res = session.post("http://127.0.0.1:5000/predict", json=data)
 
     print(f"REQUEST {i+1}")
     print(data)
@@ -0,0 +1,407 @@
+import atexit
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from featurizer import CATEGORICAL, NUMERIC, to_float
+
+# -------------------------------------------------
+# BUFFERED, ROTATING BINARY REQUEST LOG
+#
+# the API hands every scored request to append(), which
+# only parks a reference in memory; a writer thread turns
+# whatever piled up into one columnar block per flush:
+#
+#   magic "FRLG" | header length u32 | body length u32
+#   JSON header (rows, ts range, column table, dictionaries)
+#   raw little-endian column arrays, each 8-byte aligned
+#
+# strings (categoricals, decision, endpoint, model version)
+# are dictionary-encoded per block. Segments rotate on size
+# or age and are named requests-<utc time>-<pid>.frlog, so
+# every pre-forked worker writes its own files
+# -------------------------------------------------
+
+MAGIC = b"FRLG"
+PREFIX = struct.Struct("<4sII")
+ALIGN = 8
+SUFFIX = ".frlog"
+
+STRING_COLUMNS = ["endpoint", "model_version"] + CATEGORICAL + ["decision"]
+
+FIXED_COLUMNS = {
+    "ts": "<f8",
+    "latency_ms": "<f4",
+    "fraud_probability": "<f8",
+    "trees_used": "<i2",
+}
+FIXED_COLUMNS.update({col: "<f4" for col in NUMERIC})
+
+COLUMN_ORDER = (
+    ["ts", "endpoint", "model_version", "latency_ms"] + CATEGORICAL + NUMERIC
+    + ["fraud_probability", "decision", "trees_used"]
+)
+
+
+def _pad(n):
+    return (-n) % ALIGN
+
+
+def encode_block(columns):
+    n = len(columns["ts"])
+    ts = columns["ts"]
+
+    parts = []
+    table = []
+    dictionaries = {}
+    offset = 0
+
+    for name in COLUMN_ORDER:
+        values = columns[name]
+
+        if name in STRING_COLUMNS:
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+            dictionaries[name] = [str(v) for v in uniques]
+            width = "<i1" if len(uniques) < 128 else "<i2" if len(uniques) < 32768 else "<i4"
+            arr = np.ascontiguousarray(codes, dtype=width)
+        else:
+            arr = np.ascontiguousarray(values, dtype=FIXED_COLUMNS[name])
+
+        table.append([name, arr.dtype.str, offset])
+        parts.append(arr.tobytes() + b"\0" * _pad(arr.nbytes))
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    header = json.dumps({
+        "rows": n,
+        "ts_min": float(ts.min()) if n else None,
+        "ts_max": float(ts.max()) if n else None,
+        "columns": table,
+        "dictionaries": dictionaries,
+    }).encode("utf-8")
+    header += b" " * _pad(PREFIX.size + len(header))
+
+    return PREFIX.pack(MAGIC, len(header), offset) + header + b"".join(parts)
+
+
+def _column_values(item):
+    # one pending append() -> {column: sequence} with `rows` entries
+    ts, endpoint, version, inputs, probs, decisions, trees_used, latency_ms = item
+    probs = np.asarray(probs, dtype="f8")
+    rows = len(probs)
+
+    values = {
+        "ts": np.full(rows, ts),
+        "endpoint": [endpoint] * rows,
+        "model_version": [version] * rows,
+        "latency_ms": np.full(rows, latency_ms),
+        "fraud_probability": probs,
+        "decision": list(decisions),
+        "trees_used": np.full(rows, -1) if trees_used is None else np.asarray(trees_used, dtype="i8"),
+    }
+
+    if isinstance(inputs, pd.DataFrame):
+        for col in CATEGORICAL:
+            values[col] = inputs[col].astype(object).where(inputs[col].notna(), None).tolist()
+        for col in NUMERIC:
+            values[col] = pd.to_numeric(inputs[col], errors="coerce").to_numpy("f4")
+    else:
+        for col in CATEGORICAL:
+            value = inputs.get(col)
+            values[col] = [None if value is None else str(value)] * rows
+        for col in NUMERIC:
+            values[col] = np.full(rows, to_float(inputs.get(col)), dtype="f4")
+
+    # a short column would shift every row after it once blocks are concatenated
+    for name, column in values.items():
+        if len(column) != rows:
+            raise ValueError(f"{name} has {len(column)} values for {rows} rows")
+
+    return values
+
+
+def _concat(chunks):
+    merged = {}
+    for name in COLUMN_ORDER:
+        if name in STRING_COLUMNS:
+            merged[name] = [v for chunk in chunks for v in chunk[name]]
+        else:
+            merged[name] = np.concatenate([chunk[name] for chunk in chunks])
+    return merged
+
+
+class RequestLog:
+
+    def __init__(self, directory="logs", max_bytes=64 << 20, max_age=3600.0,
+                 flush_interval=1.0, max_pending_rows=200000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.max_pending_rows = max_pending_rows
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._pending_rows = 0
+        self._pid = None
+        self._thread = None
+        self._closing = False
+
+        self._fh = None
+        self._opened_at = 0.0
+        self.segment = None
+
+        self.rows_written = 0
+        self.blocks_written = 0
+        self.bytes_written = 0
+        self.segments_opened = 0
+        self.dropped_rows = 0
+        self.write_errors = 0
+        self.bad_entries = 0
+
+    def _ensure_writer(self):
+        # started lazily and restarted after fork: threads don't survive fork()
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pending = []
+                self._pending_rows = 0
+                self._fh = None
+                self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+                atexit.register(self.close)
+
+    def append(self, endpoint, inputs, probs, decisions, trees_used, version, latency_ms):
+        # request path: O(1), no encoding and no I/O
+        self._ensure_writer()
+        rows = len(probs)
+
+        with self._lock:
+            if self._closing or self._pending_rows + rows > self.max_pending_rows:
+                self.dropped_rows += rows
+                return
+            self._pending.append(
+                (time.time(), endpoint, version, inputs, probs, decisions, trees_used, latency_ms)
+            )
+            self._pending_rows += rows
+
+    def _take(self):
+        with self._lock:
+            items, self._pending = self._pending, []
+            self._pending_rows = 0
+        return items
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            closing = self._closing
+            self.flush()
+            if closing:
+                return
+
+    def flush(self):
+        items = self._take()
+        block, rows = self._encode(items)
+
+        try:
+            if block is not None:
+                self._write(block, rows)
+            elif self._fh is not None and time.time() - self._opened_at >= self.max_age:
+                self._close_segment()
+        except Exception as e:
+            self.write_errors += 1
+            print(f"request log: dropped {rows} rows ({e})", file=sys.stderr)
+
+    def _encode(self, items):
+        # -> (one block of every item that encodes, its rows); a bad entry
+        #    costs only itself, not the rest of the block
+        chunks = []
+        for item in items:
+            try:
+                chunks.append(_column_values(item))
+            except Exception as e:
+                self._reject(e)
+
+        if not chunks:
+            return None, 0
+
+        try:
+            block = encode_block(_concat(chunks))
+        except Exception:
+            # values that only fail once encoded (e.g. unhashable categoricals):
+            # find them entry by entry, which only happens when a block fails
+            good = []
+            for chunk in chunks:
+                try:
+                    encode_block(chunk)
+                    good.append(chunk)
+                except Exception as e:
+                    self._reject(e)
+            chunks = good
+            if not chunks:
+                return None, 0
+            block = encode_block(_concat(chunks))
+
+        return block, sum(len(c["ts"]) for c in chunks)
+
+    def _reject(self, error):
+        self.bad_entries += 1
+        print(f"request log: dropped an entry that can't be encoded ({error})", file=sys.stderr)
+
+    def _write(self, block, rows):
+        if self._fh is not None and (
+            self._fh.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age
+        ):
+            self._close_segment()
+
+        if self._fh is None:
+            self._open_segment()
+
+        # one write per block: a crash leaves at most a truncated tail, which readers skip
+        self._fh.write(block)
+        self._fh.flush()
+
+        self.rows_written += rows
+        self.blocks_written += 1
+        self.bytes_written += len(block)
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        base = os.path.join(self.directory, f"requests-{stamp}-{os.getpid()}")
+
+        path, n = base + SUFFIX, 1
+        while os.path.exists(path):
+            path, n = f"{base}.{n}{SUFFIX}", n + 1
+
+        self._fh = open(path, "ab")
+        self._opened_at = time.time()
+        self.segment = path
+        self.segments_opened += 1
+
+    def _close_segment(self):
+        self._fh.close()
+        self._fh = None
+
+    def close(self):
+        if self._thread is None or self._pid != os.getpid() or self._closing:
+            return
+        self._closing = True
+        self._wake.set()
+        self._thread.join(timeout=10)
+        if self._fh is not None:
+            self._close_segment()
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending_rows
+        return {
+            "directory": self.directory,
+            "segment": self.segment,
+            "pending_rows": pending,
+            "rows_written": self.rows_written,
+            "blocks_written": self.blocks_written,
+            "bytes_written": self.bytes_written,
+            "segments_opened": self.segments_opened,
+            "dropped_rows": self.dropped_rows,
+            "write_errors": self.write_errors,
+            "bad_entries": self.bad_entries,
+        }
+
+
+# -------------------------------------------------
+# READER (retraining / replay)
+# -------------------------------------------------
+def segments(directory="logs"):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SUFFIX)
+    )
+
+
+def iter_blocks(path, start=None, end=None):
+    # yields {column: array}; blocks outside [start, end) are skipped by header alone
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return
+        buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+    pos = 0
+    while pos + PREFIX.size <= len(buf):
+        magic, header_len, body_len = PREFIX.unpack_from(buf, pos)
+        body = pos + PREFIX.size + header_len
+        if magic != MAGIC or body + body_len > len(buf):
+            break   # truncated tail of a crashed writer
+
+        header = json.loads(bytes(buf[pos + PREFIX.size:body]).decode("utf-8"))
+        pos = body + body_len
+        rows = header["rows"]
+
+        if not rows or (start is not None and header["ts_max"] < start) or (
+            end is not None and header["ts_min"] >= end
+        ):
+            continue
+
+        block = {}
+        for name, dtype, offset in header["columns"]:
+            arr = np.frombuffer(buf, dtype=dtype, count=rows, offset=body + offset)
+            if name in header["dictionaries"]:
+                arr = pd.Categorical.from_codes(arr.astype("i4"), header["dictionaries"][name])
+            block[name] = arr
+        yield block
+
+
+def read_log(directory="logs", start=None, end=None, columns=None):
+    frames = []
+
+    for path in segments(directory):
+        for block in iter_blocks(path, start, end):
+            df = pd.DataFrame({name: block[name] for name in (columns or COLUMN_ORDER)})
+            if start is not None or end is not None:
+                ts = block["ts"]
+                keep = np.ones(len(ts), dtype=bool)
+                if start is not None:
+                    keep &= ts >= start
+                if end is not None:
+                    keep &= ts < end
+                df = df[keep]
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=columns or COLUMN_ORDER)
+
+    # blocks carry their own dictionaries: re-unify the string columns after concat
+    df = pd.concat(frames, ignore_index=True)
+    for name in STRING_COLUMNS:
+        if name in df:
+            df[name] = df[name].astype("category")
+    if "trees_used" in df:
+        df["trees_used"] = df["trees_used"].where(df["trees_used"] >= 0)
+    return df
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "logs"
+    paths = segments(directory)
+
+    t0 = time.perf_counter()
+    log = read_log(directory)
+    elapsed = time.perf_counter() - t0
+
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"{len(paths)} segments, {size / 1024:.1f} KiB, {len(log)} rows read in {elapsed * 1000:.1f} ms")
+
+    if len(log):
+        print(log["decision"].value_counts().to_string())
+        print(log.tail(5).to_string())
@@ -0,0 +1,117 @@
+import threading
+
+import numpy as np
+
+# -------------------------------------------------
+# FIXED-CAPACITY COLUMNAR RING BUFFER
+# one preallocated NumPy column per field; append() is
+# O(1) (one slot write per column), the oldest row is
+# overwritten once full, so memory stays flat however
+# long the session runs. "category" columns store int16
+# codes and keep running counts of everything appended;
+# past max_categories distinct values, new ones all count
+# as OTHER, so the dictionary stays bounded too
+# -------------------------------------------------
+
+CATEGORY = "category"
+OTHER = "(other)"
+MAX_CODES = np.iinfo(np.int16).max + 1
+
+
+class ColumnarRing:
+
+    def __init__(self, capacity, columns, max_categories=1024):
+        # columns: {name: numpy dtype or "category"}
+        if not 1 < max_categories <= MAX_CODES:
+            raise ValueError(f"max_categories must be from 2 to {MAX_CODES}, got {max_categories}")
+        self.capacity = capacity
+        self.max_categories = max_categories
+        self._lock = threading.Lock()
+
+        self.size = 0
+        self.appended = 0
+        self._next = 0
+
+        self.data = {}
+        self.categories = {}
+        self._codes = {}
+        self._totals = {}
+        self._missing = {}
+
+        for name, dtype in columns.items():
+            if dtype == CATEGORY:
+                self.data[name] = np.full(capacity, -1, dtype=np.int16)
+                self.categories[name] = []
+                self._codes[name] = {}
+                self._totals[name] = []
+                self._missing[name] = -1
+            else:
+                dtype = np.dtype(dtype)
+                self._missing[name] = np.nan if dtype.kind == "f" else -1
+                self.data[name] = np.full(capacity, self._missing[name], dtype=dtype)
+
+    def _code(self, name, value):
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None and len(self.categories[name]) >= self.max_categories - 1:
+            # the last code is shared by every value past the limit
+            value = OTHER
+            code = codes.get(OTHER)
+        if code is None:
+            code = codes[value] = len(self.categories[name])
+            self.categories[name].append(value)
+            self._totals[name].append(0)
+        self._totals[name][code] += 1
+        return code
+
+    def append(self, row):
+        with self._lock:
+            i = self._next
+
+            for name, column in self.data.items():
+                value = row.get(name)
+                if value is None:
+                    column[i] = self._missing[name]
+                elif name in self._codes:
+                    column[i] = self._code(name, value)
+                else:
+                    column[i] = value
+
+            self._next = (i + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.appended += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def last(self, n, names=None):
+        # oldest-to-newest copy of the newest n rows; categories are decoded
+        with self._lock:
+            n = min(n, self.size)
+            idx = (self._next - n + np.arange(n)) % self.capacity
+
+            view = {}
+            for name in names or self.data:
+                values = self.data[name].take(idx)
+                if name in self._codes:
+                    labels = np.array(self.categories[name] + [None], dtype=object)
+                    values = labels[values]   # code -1 -> None
+                view[name] = values
+            return view
+
+    def counts(self, name):
+        # running counts over everything ever appended (not just the buffer)
+        with self._lock:
+            return dict(zip(self.categories[name], self._totals[name]))
+
+    def window_counts(self, name):
+        # counts over the rows currently held
+        with self._lock:
+            codes = self.data[name][:self.size]
+            hist = np.bincount(codes[codes >= 0], minlength=len(self.categories[name]))
+            return dict(zip(self.categories[name], hist.tolist()))
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.data.values())
@@ -0,0 +1,115 @@
+import gc
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+
+# -------------------------------------------------
+# PRODUCTION SERVING (pre-fork)
+# python serve.py
+#
+# fraud_api is imported once in the master, so the model,
+# featurizer and forest arrays are built before forking and
+# every worker shares those pages copy-on-write. the kernel
+# balances connections across workers on the shared socket.
+#
+# models are loaded here too: on a new file, a POST
+# /admin/reload or a HUP the master loads the target
+# version, then replaces every worker with a fresh fork
+#
+#   kill -HUP  <master pid>   reload the model, graceful restart of all workers
+#   kill -TTIN / -TTOU        add / remove a worker
+#   kill -TERM <master pid>   graceful shutdown
+# -------------------------------------------------
+
+# loopback only unless opted in (e.g. FRAUD_BIND=0.0.0.0:5000 behind a firewall or proxy)
+BIND = os.environ.get("FRAUD_BIND", "127.0.0.1:5000")
+WORKERS = int(os.environ.get("FRAUD_WORKERS", multiprocessing.cpu_count()))
+THREADS = int(os.environ.get("FRAUD_THREADS", "4"))
+
+# recycle workers every N requests (0 = never), jitter avoids restarting all at once
+MAX_REQUESTS = int(os.environ.get("FRAUD_MAX_REQUESTS", "0"))
+
+# /stream holds a thread for as long as it is open: keep half of them for scoring
+os.environ.setdefault("FRAUD_STREAM_MAX", str(max(1, THREADS // 2)))
+
+# /metrics and /admin/profiler cover every worker: they pool their state here
+METRICS_DIR = os.environ.setdefault(
+    "FRAUD_METRICS_DIR", os.path.join(tempfile.gettempdir(), f"fraud_metrics_{os.getpid()}")
+)
+
+
+def log_model(server, store):
+    model = store.current
+    server.log.info("model %s (%s) preloaded, forking %s workers", model.version, model.engine, WORKERS)
+    if model.specialize_report is not None:
+        server.log.info("specialized tables: %s", model.specialize_report)
+
+
+def when_ready(server):
+    import fraud_api
+    fraud_api.MASTER_PID = server.pid
+    # before forking, so every worker writes into the same ring
+    fraud_api.open_recent_ring()
+
+    # everything allocated so far (the preloaded model) moves to a permanent
+    # generation, so the collector in the workers never writes to those pages
+    gc.freeze()
+
+    # the workers don't watch for models, the master does and HUPs itself
+    store = fraud_api.store
+    store.on_change = lambda path: os.kill(server.pid, signal.SIGHUP)
+    store.ensure_watcher()
+    log_model(server, store)
+
+
+def on_reload(server):
+    # runs in the master before the new workers fork; a model that fails to
+    # load or warm up leaves the current one in place
+    from fraud_api import store
+    gc.unfreeze()
+    store.reload(wait=True)
+    if store.last_reload["status"] == "failed":
+        server.log.error("model reload failed: %s", store.last_reload["error"])
+    gc.collect()
+    gc.freeze()
+    log_model(server, store)
+
+
+def on_exit(server):
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+
+class FraudServer(BaseApplication):
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from fraud_api import app
+        return app
+
+
+if __name__ == "__main__":
+    FraudServer({
+        "bind": BIND,
+        "workers": WORKERS,
+        # threads per worker so the micro-batcher still sees concurrent requests
+        "worker_class": "gthread",
+        "threads": THREADS,
+        "preload_app": True,
+        "when_ready": when_ready,
+        "on_reload": on_reload,
+        "on_exit": on_exit,
+        "graceful_timeout": 30,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS // 10,
+    }).run()
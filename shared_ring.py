@@ -0,0 +1,231 @@
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# SHARED-MEMORY RING OF RECENT SCORED EVENTS
+#
+#   header (64 bytes): magic | capacity | head | closed | owner pid
+#   capacity fixed-layout records (RECORD below)
+#
+# the API creates the segment before forking its workers,
+# so every worker writes into the same mapping (writers
+# serialize on a fork-inherited lock). Dashboards attach
+# by name and never lock: each slot carries a sequence
+# number (odd while being written, 2n+2 once record n is
+# complete), checked before and after copying the slots.
+# A segment left by an exited owner is replaced; one whose
+# owner is still running is refused
+# -------------------------------------------------
+
+MAGIC = 0x46524E47   # "FRNG"
+HEADER_BYTES = 64
+
+HEADER = np.dtype([
+    ("magic", "<u4"),
+    ("capacity", "<u4"),
+    ("head", "<u8"),
+    ("closed", "<u4"),
+    ("owner", "<u8"),
+])
+
+STRING_FIELDS = {
+    "product_category": 24,
+    "payment_method": 16,
+    "return_reason": 32,
+    "refund_type": 16,
+    "decision": 20,
+    "model_version": 16,
+}
+NUMBER_FIELDS = {
+    "ts": "<f8",
+    "fraud_probability": "<f4",
+    "is_fraud": "i1",
+    "order_amount": "<f4",
+    "past_returns": "<f4",
+    "delivery_delay_days": "<f4",
+}
+
+RECORD = np.dtype(
+    [("seq", "<u8")]
+    + list(NUMBER_FIELDS.items())
+    + [(name, f"S{width}") for name, width in STRING_FIELDS.items()]
+)
+
+
+def _number(value, kind):
+    if value is None:
+        return -1 if kind == "i" else np.nan
+    try:
+        return float(value) if kind == "f" else int(value)
+    except (TypeError, ValueError):
+        return -1 if kind == "i" else np.nan
+
+
+def _text(value, width):
+    # cut on a character boundary, so a long non-ASCII value stays valid UTF-8
+    data = str(value or "").encode("utf-8")[:width]
+    return data.decode("utf-8", "ignore").encode("utf-8")
+
+
+def _layout(buf, capacity):
+    header = np.ndarray((), dtype=HEADER, buffer=buf)
+    records = np.ndarray((capacity,), dtype=RECORD, buffer=buf, offset=HEADER_BYTES)
+    return header, records
+
+
+class SharedRing:
+
+    def __init__(self, name="fraud_recent", capacity=1024):
+        self.name = name
+        self.capacity = capacity
+        self._lock = multiprocessing.Lock()
+        self._owner = os.getpid()
+
+        size = HEADER_BYTES + capacity * RECORD.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self._replace_stale(name)
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+
+        self.header, self.records = _layout(self._shm.buf, capacity)
+        self.records[:] = np.zeros(capacity, dtype=RECORD)
+        self.header["capacity"] = capacity
+        self.header["head"] = 0
+        self.header["closed"] = 0
+        self.header["owner"] = self._owner
+        self.header["magic"] = MAGIC
+
+        atexit.register(self.close)
+
+    def _replace_stale(self, name):
+        # only a ring whose owner has exited (a crashed API) is taken over:
+        # its readers are told, then it is unlinked
+        stale = shared_memory.SharedMemory(name)
+        magic = owner = None
+        if stale.size >= HEADER_BYTES:
+            header = np.ndarray((), dtype=HEADER, buffer=stale.buf)
+            magic, owner = int(header["magic"]), int(header["owner"])
+            if magic == MAGIC and (owner == os.getpid() or not _alive(owner)):
+                header["closed"] = 1
+            del header
+        stale.close()
+
+        if magic != MAGIC:
+            raise FileExistsError(f"shared memory {name!r} exists and is not a ring")
+        if owner != os.getpid() and _alive(owner):
+            raise FileExistsError(f"shared memory {name!r} is in use by process {owner}")
+        stale.unlink()
+
+    def append(self, event):
+        fields = tuple(
+            _number(event.get(name), np.dtype(kind).kind) for name, kind in NUMBER_FIELDS.items()
+        ) + tuple(
+            _text(event.get(name), width) for name, width in STRING_FIELDS.items()
+        )
+
+        with self._lock:
+            n = int(self.header["head"])
+            i = n % self.capacity
+            self.records["seq"][i] = 2 * n + 1   # odd: readers skip this slot
+            self.records[i] = (2 * n + 1,) + fields
+            self.records["seq"][i] = 2 * n + 2
+            self.header["head"] = n + 1
+
+    def close(self):
+        # only the creating process (the gunicorn master, not its workers) tears down
+        if os.getpid() != self._owner or self._shm is None:
+            return
+        replaced = bool(self.header["closed"])
+        self.header["closed"] = 1
+        self.header = self.records = None
+        self._shm.close()
+        if not replaced:
+            self._shm.unlink()
+        self._shm = None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedRingReader:
+
+    def __init__(self, name="fraud_recent"):
+        self.name = name
+        self._shm = None
+        self._lock = threading.Lock()   # sessions of one dashboard share a reader
+
+    def _attach(self):
+        # attaching registers the segment with this process's resource tracker,
+        # which would unlink it when the dashboard exits; it isn't ours to remove
+        try:
+            if sys.version_info >= (3, 13):
+                shm = shared_memory.SharedMemory(self.name, track=False)
+            else:
+                shm = shared_memory.SharedMemory(self.name)
+                resource_tracker.unregister(shm._name, "shared_memory")
+        except FileNotFoundError:
+            return False
+
+        magic, capacity = np.frombuffer(shm.buf, dtype="<u4", count=2).tolist()
+        if magic != MAGIC or shm.size < HEADER_BYTES + capacity * RECORD.itemsize:
+            shm.close()
+            return False
+
+        self._shm = shm
+        self.header, self.records = _layout(shm.buf, capacity)
+        return True
+
+    def _detach(self):
+        self.header = self.records = None
+        self._shm.close()
+        self._shm = None
+
+    def recent(self, k):
+        # -> DataFrame of up to k newest complete records, oldest first
+        #    (None while the API hasn't created the segment)
+        with self._lock:
+            return self._recent(k)
+
+    def _recent(self, k):
+        if self._shm is not None and self.header["closed"]:
+            self._detach()
+        if self._shm is None and not self._attach():
+            return None
+
+        capacity = len(self.records)
+        head = int(self.header["head"])
+        n = min(k, head, capacity)
+        numbers = head - n + np.arange(n, dtype=np.uint64)
+        idx = (numbers % capacity).astype(np.intp)
+        expected = 2 * numbers + 2
+
+        before = self.records["seq"].take(idx)
+        rows = self.records.take(idx)
+        after = self.records["seq"].take(idx)
+        rows = rows[(before == expected) & (after == expected)]
+
+        df = pd.DataFrame({name: rows[name] for name in NUMBER_FIELDS})
+        for name in STRING_FIELDS:
+            df[name] = np.char.decode(rows[name], "utf-8", "replace")
+        df["is_fraud"] = df["is_fraud"].where(df["is_fraud"] >= 0)
+        return df
+
+    def close(self):
+        with self._lock:
+            if self._shm is not None:
+                self._detach()
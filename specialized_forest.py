@@ -0,0 +1,327 @@
+import sys
+import time
+
+import numpy as np
+
+from forest_engine import CHUNK_ROWS, FlatForest
+
+# -------------------------------------------------
+# CATEGORICAL-SPECIALIZED FOREST
+# the forest is partially evaluated once for every
+# combination of the four categorical inputs (unknown
+# included). each combination keeps a pruned forest that
+# only splits on the numeric features plus the summed
+# value of the trees that collapsed to a single leaf.
+# identical pruned trees are stored once, so a combination
+# is just a count per distinct pruned tree: every row
+# walks the same small set of trees and the combination
+# picks the weights.
+#
+# the build is expensive for deep forests (every combination
+# walks every tree), so it is bounded by a size and time
+# budget and normally done once, offline, into the model
+# artifact (model_artifact.py), which maps the tables back
+# -------------------------------------------------
+
+# stored in the model artifact as spec_<name>
+ARRAYS = {
+    "feature": "<i8",
+    "threshold": "<f8",
+    "left": "<i8",
+    "right": "<i8",
+    "missing_left": "|b1",
+    "value": "<f8",
+    "children": "<i8",
+    "roots": "<i8",
+    "counts": "<f8",
+    "const": "<f8",
+    "radix": "<i8",
+}
+
+# per unique node: the six node arrays plus the interleaved children
+NODE_BYTES = 8 + 8 + 8 + 8 + 1 + 8 + 16
+
+
+class SpecializedForest:
+
+    def __init__(self, forest, featurizer, max_mb=None, max_seconds=None):
+        # raises ValueError once the tables would exceed max_mb or the
+        # build runs past max_seconds (None = unbounded)
+        start = time.perf_counter()
+        self.n_trees = forest.n_trees
+        self.n_numeric = len(featurizer.numeric)
+
+        # one-hot feature -> (group, code), numeric feature -> column
+        onehot = {}
+        for g, (_, values) in enumerate(featurizer.categories):
+            for code in range(len(values)):
+                onehot[featurizer.offsets[g] + code] = (g, code)
+        numeric = {idx: i for i, (_, idx) in enumerate(featurizer.numeric)}
+
+        # radix = vocabulary size + 1 slot for "unknown"
+        self.radix = np.array([len(values) + 1 for _, values in featurizer.categories])
+        self.n_combos = int(np.prod(self.radix))
+        self.strides = np.append(np.cumprod(self.radix[::-1])[::-1][1:], 1)
+        max_bytes = None if max_mb is None else max_mb * 2**20
+
+        nodes = _NodeTable()
+        tree_ids = {}
+        const = np.zeros(self.n_combos)
+        counts = []
+
+        for combo in range(self.n_combos):
+            codes = self.decode(combo)
+            row = {}
+
+            for root in forest.roots:
+                tree = _prune(forest, root, codes, onehot, numeric)
+
+                if tree[0] == "leaf":
+                    const[combo] += tree[1]
+                else:
+                    if tree not in tree_ids:
+                        tree_ids[tree] = len(tree_ids)
+                        nodes.add(tree)
+                    row[tree_ids[tree]] = row.get(tree_ids[tree], 0) + 1
+
+                if max_seconds is not None and time.perf_counter() - start > max_seconds:
+                    raise ValueError(f"specialization exceeded {max_seconds:g} s")
+
+            counts.append(row)
+
+            size = len(nodes.feature) * NODE_BYTES + self.n_combos * len(tree_ids) * 8
+            if max_bytes is not None and size > max_bytes:
+                raise ValueError(f"specialized tables exceed {max_mb:g} MB")
+
+        self.const = const
+        self.counts = np.zeros((self.n_combos, len(tree_ids)))
+        for combo, row in enumerate(counts):
+            for tree_id, count in row.items():
+                self.counts[combo, tree_id] = count
+
+        self.forest = nodes.to_forest()
+        self.roots = np.asarray([nodes.ids[tree][0] for tree in tree_ids], dtype=np.intp)
+        self.build_seconds = time.perf_counter() - start
+
+    def arrays(self):
+        forest = self.forest
+        return {
+            "feature": forest.feature,
+            "threshold": forest.threshold,
+            "left": forest.left,
+            "right": forest.right,
+            "missing_left": forest.missing_left,
+            "value": forest.value,
+            "children": forest.children,
+            "roots": self.roots,
+            "counts": self.counts,
+            "const": self.const,
+            "radix": self.radix,
+        }
+
+    def meta(self):
+        return {
+            "n_trees": self.n_trees,
+            "n_numeric": self.n_numeric,
+            "max_depth": self.forest.max_depth,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, meta):
+        # wraps stored tables (e.g. memory-mapped) without copying or rebuilding
+        self = cls.__new__(cls)
+        self.n_trees = meta["n_trees"]
+        self.n_numeric = meta["n_numeric"]
+        self.build_seconds = 0.0
+
+        self.radix = arrays["radix"]
+        self.n_combos = int(np.prod(self.radix))
+        self.strides = np.append(np.cumprod(self.radix[::-1])[::-1][1:], 1)
+
+        self.forest = FlatForest(
+            arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"],
+            arrays["missing_left"], arrays["value"], np.zeros(0, dtype=np.intp), meta["max_depth"],
+            children=arrays["children"], rest_min=np.zeros(1), rest_max=np.zeros(1),
+        )
+        self.roots = arrays["roots"]
+        self.counts = arrays["counts"]
+        self.const = arrays["const"]
+        return self
+
+    def decode(self, combo):
+        return [(combo // int(stride)) % int(r) for stride, r in zip(self.strides, self.radix)]
+
+    def combo_ids(self, codes):
+        # codes: (n_rows, n_groups) with -1 for unknown
+        codes = np.asarray(codes)
+        codes = np.where(codes < 0, self.radix - 1, codes)
+        return codes @ self.strides
+
+    def _score(self, combos, X):
+        if len(self.roots) == 0:
+            return self.const[combos] / self.n_trees
+
+        # (distinct trees, rows) values, weighted by the per-combination counts
+        values = self.forest.value.take(self.forest.leaves(X, self.roots))
+        weighted = np.einsum("ij,ji->i", self.counts[combos], values)
+        return (self.const[combos] + weighted) / self.n_trees
+
+    def predict_one(self, codes, numeric_row):
+        return self._score(self.combo_ids([codes]), numeric_row)[0]
+
+    def predict_proba(self, codes, X_numeric):
+        X_numeric = np.asarray(X_numeric, dtype=np.float32)
+        combos = self.combo_ids(codes)
+        out = np.empty(len(X_numeric))
+
+        for start in range(0, len(X_numeric), CHUNK_ROWS):
+            end = start + CHUNK_ROWS
+            out[start:end] = self._score(combos[start:end], X_numeric[start:end])
+
+        return out
+
+    @property
+    def nbytes(self):
+        return self.forest.nbytes + self.roots.nbytes + self.counts.nbytes + self.const.nbytes
+
+
+def _prune(forest, node, codes, onehot, numeric):
+    # nested tuple form of the subtree under `node` with categorical splits resolved
+    left = forest.left[node]
+    if left == node:
+        return ("leaf", float(forest.value[node]))
+
+    feature = int(forest.feature[node])
+    threshold = float(forest.threshold[node])
+
+    if feature in onehot:
+        g, code = onehot[feature]
+        x = 1.0 if codes[g] == code else 0.0
+        child = left if x <= threshold else forest.right[node]
+        return _prune(forest, child, codes, onehot, numeric)
+
+    return (
+        "split",
+        numeric[feature],
+        threshold,
+        bool(forest.missing_left[node]),
+        _prune(forest, left, codes, onehot, numeric),
+        _prune(forest, forest.right[node], codes, onehot, numeric),
+    )
+
+
+class _NodeTable:
+    # hash-consed node storage: equal subtrees share node ids
+
+    def __init__(self):
+        self.ids = {}
+        self.feature, self.threshold, self.missing_left = [], [], []
+        self.left, self.right, self.value = [], [], []
+
+    def add(self, tree):
+        # returns (node id, depth)
+        if tree in self.ids:
+            return self.ids[tree]
+
+        if tree[0] == "leaf":
+            node = self._new(0, np.inf, False, tree[1])
+            self.left[node] = self.right[node] = node
+            depth = 0
+        else:
+            _, feature, threshold, missing_left, lt, rt = tree
+            left, dl = self.add(lt)
+            right, dr = self.add(rt)
+            node = self._new(feature, threshold, missing_left, 0.0)
+            self.left[node], self.right[node] = left, right
+            depth = 1 + max(dl, dr)
+
+        self.ids[tree] = (node, depth)
+        return node, depth
+
+    def _new(self, feature, threshold, missing_left, value):
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.missing_left.append(missing_left)
+        self.value.append(value)
+        self.left.append(-1)
+        self.right.append(-1)
+        return len(self.feature) - 1
+
+    def to_forest(self):
+        # roots are chosen per combination, so the forest itself has none
+        max_depth = max((d for _, d in self.ids.values()), default=0)
+        return FlatForest(
+            np.asarray(self.feature, dtype=np.intp),
+            np.asarray(self.threshold, dtype=np.float64),
+            np.asarray(self.left, dtype=np.intp),
+            np.asarray(self.right, dtype=np.intp),
+            np.asarray(self.missing_left, dtype=bool),
+            np.asarray(self.value, dtype=np.float64),
+            np.zeros(0, dtype=np.intp),
+            max_depth,
+        )
+
+
+if __name__ == "__main__":
+    # report: python specialized_forest.py [fraud_model.pkl]
+    import pickle
+    import warnings
+
+    import pandas as pd
+
+    from featurizer import Featurizer
+
+    warnings.filterwarnings("ignore")
+
+    pipe = pickle.load(open(sys.argv[1] if len(sys.argv) > 1 else "fraud_model.pkl", "rb"))
+    featurizer = Featurizer.from_pipeline(pipe)
+    estimator = pipe.named_steps["model"]
+    forest = FlatForest.from_sklearn(estimator)
+
+    start = time.perf_counter()
+    spec = SpecializedForest(forest, featurizer)
+    build = time.perf_counter() - start
+
+    kept = spec.counts.sum(axis=1)
+    print(f"combinations        {spec.n_combos}")
+    print(f"build time          {build:.2f} s")
+    print(f"trees kept / combo  mean {kept.mean():.1f}  max {kept.max():.0f}  (of {forest.n_trees})")
+    print(f"distinct trees      {len(spec.roots)}  depth {spec.forest.max_depth}")
+    print(f"unique nodes        {spec.forest.n_nodes}  (flat forest: {forest.n_nodes})")
+    print(f"memory              {spec.nbytes / 1024:.1f} KiB  (flat forest: {forest.nbytes / 1024:.1f} KiB)")
+
+    rng = np.random.default_rng(11)
+    n = 20000
+    data = {col: rng.choice(values + ["?"], n) for col, values in featurizer.categories}
+    data["order_amount"] = rng.integers(300, 7000, n)
+    data["past_returns"] = rng.integers(0, 8, n)
+    data["delivery_delay_days"] = rng.integers(0, 5, n)
+    df = pd.DataFrame(data)
+
+    X = featurizer.transform_frame(df)
+    codes = featurizer.codes_frame(df)
+    X_num = featurizer.numeric_frame(df)
+
+    diff = np.abs(spec.predict_proba(codes, X_num) - estimator.predict_proba(X)[:, 1]).max()
+    print(f"max |sklearn - specialized| over {n} rows: {diff:.3g}")
+    print()
+
+    def timeit(fn, repeat):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1e3
+
+    record = df.iloc[0].to_dict()
+    row = featurizer.transform_one(record).copy()
+    print(f"{'rows':>8} {'sklearn ms':>12} {'flat ms':>10} {'special ms':>11}")
+    print(f"{1:>8} {timeit(lambda: estimator.predict_proba(row), 200):>12.3f} "
+          f"{timeit(lambda: forest.predict_proba(row), 2000):>10.3f} "
+          f"{timeit(lambda: spec.predict_one(featurizer.codes(record), featurizer.numeric_row(record)), 2000):>11.3f}")
+
+    for size, repeat in [(100, 100), (1000, 20), (10000, 5)]:
+        print(f"{size:>8} {timeit(lambda: estimator.predict_proba(X[:size]), repeat):>12.3f} "
+              f"{timeit(lambda: forest.predict_proba(X[:size]), repeat):>10.3f} "
+              f"{timeit(lambda: spec.predict_proba(codes[:size], X_num[:size]), repeat):>11.3f}")
@@ -0,0 +1,135 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from featurizer import CATEGORICAL, NUMERIC
+from generate_dataset import generate_chunk
+from model_artifact import file_version, save_artifact
+from model_store import COLUMNS, ModelStore, ScoringModel
+from prediction_cache import PredictionCache, canonical_key
+
+ENGINES = ["sklearn", "flat", "cascade", "specialized"]
+CASCADE_MAX_ERROR = 0.05
+
+# seen values, unseen categories, missing fields
+RECORDS = [
+    {"order_amount": 1200, "product_category": "Clothing", "payment_method": "UPI",
+     "return_reason": "Wrong Size", "past_returns": 0, "delivery_delay_days": 1, "refund_type": "Post"},
+    {"order_amount": 5400, "product_category": "Electronics", "payment_method": "COD",
+     "return_reason": "Not Delivered", "past_returns": 6, "delivery_delay_days": 0, "refund_type": "Instant"},
+    {"order_amount": 3600, "product_category": "Toys", "payment_method": "Crypto",
+     "return_reason": "Changed mind", "past_returns": 4, "delivery_delay_days": 3, "refund_type": "Store credit"},
+    {"order_amount": 700, "product_category": "Books"},
+]
+
+
+def train(path, seed):
+    df = generate_chunk(np.random.default_rng(seed), 3000)
+    pipe = Pipeline(steps=[
+        ("prep", ColumnTransformer(transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+            ("num", "passthrough", NUMERIC),
+        ])),
+        ("model", RandomForestClassifier(n_estimators=24, max_depth=8, random_state=seed)),
+    ])
+    pipe.fit(df[COLUMNS], df["is_fraud"])
+
+    with open(path, "wb") as fh:
+        pickle.dump(pipe, fh)
+    return pipe
+
+
+def frame(records):
+    return pd.DataFrame([[rec.get(col) for col in COLUMNS] for rec in records], columns=COLUMNS)
+
+
+def bands(probs):
+    # the API's decision and is_fraud flag for each probability
+    probs = np.asarray(probs)
+    return np.select([probs < 0.30, probs < 0.70], [0, 1], 2), probs > 0.5
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("model") / "model.pkl")
+    pipe = train(path, seed=7)
+    save_artifact(pipe, os.path.splitext(path)[0] + ".bin", version=file_version(path))
+
+    records = RECORDS + generate_chunk(np.random.default_rng(1), 300)[COLUMNS].to_dict("records")
+    return path, pipe, records, pipe.predict_proba(frame(records))[:, 1]
+
+
+@pytest.mark.parametrize("from_artifact", [False, True])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engine_matches_pipeline(trained, engine, from_artifact):
+    path, _, records, expected = trained
+    artifact = None if from_artifact else os.path.join(os.path.dirname(path), "missing.bin")
+    model = ScoringModel(path, engine=engine, artifact_path=artifact, cascade_max_error=CASCADE_MAX_ERROR)
+    assert model.from_artifact == (from_artifact and engine != "sklearn")
+
+    single = np.array([model.predict_one(rec)[0] for rec in records])
+    batch, _ = model.predict_many(frame(records))
+
+    for probs in (single, np.asarray(batch)):
+        if engine == "cascade":
+            # early exit may stop short of the full average, never across a band
+            assert np.abs(probs - expected).max() <= CASCADE_MAX_ERROR + 1e-9
+            decision, flagged = bands(probs)
+            full_decision, full_flagged = bands(expected)
+            assert (decision == full_decision).all()
+            assert (flagged == full_flagged).all()
+        else:
+            np.testing.assert_allclose(probs, expected, rtol=0, atol=1e-6)
+
+
+def test_cascade_exact_without_error_budget(trained):
+    path, _, records, expected = trained
+    model = ScoringModel(path, engine="cascade", cascade_max_error=None)
+    probs, used = model.predict_many(frame(records))
+
+    assert (bands(probs)[0] == bands(expected)[0]).all()
+    assert (bands(probs)[1] == bands(expected)[1]).all()
+    assert (used <= model.forest.n_trees).all()
+
+
+def test_model_swap_invalidates_cache(tmp_path):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    first = str(model_dir / "a.pkl")
+    train(first, seed=1)
+
+    cache = PredictionCache(100)
+    store = ModelStore(first, model_dir=str(model_dir), poll_interval=0,
+                       on_swap=lambda m: cache.set_version(m.version), engine="flat")
+    old_version = store.current.version
+
+    record = RECORDS[1]
+    key = canonical_key(record, CATEGORICAL, NUMERIC)
+    cache.put(key, store.current.predict_one(record)[0], old_version)
+    assert cache.get(key) is not None
+
+    second = str(model_dir / "b.pkl")
+    pipe = train(second, seed=2)
+    os.utime(second, (os.path.getmtime(first) + 10,) * 2)
+    store.reload(wait=True)
+
+    assert store.last_reload["status"] == "loaded"
+    assert store.current.version == file_version(second) != old_version
+    assert cache.get(key) is None
+
+    # a result still in flight from the old model is not cached either
+    cache.put(key, 0.0, old_version)
+    assert cache.get(key) is None
+
+    expected = pipe.predict_proba(frame([record]))[:, 1][0]
+    assert store.current.predict_one(record)[0] == pytest.approx(expected, abs=1e-6)
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_store import EventStore
+
+WRITERS = 4
+EVENTS_PER_WRITER = 150
+SEGMENT_BYTES = 2048   # a few dozen records: appends roll segments constantly
+
+
+def append_events(directory, writer, start, results):
+    store = EventStore(directory, max_segment_bytes=SEGMENT_BYTES)
+    start.wait()
+    offsets = []
+    for i in range(0, EVENTS_PER_WRITER, 3):
+        # single appends and small batches interleave with the other writers
+        batch = [{"writer": writer, "seq": j} for j in range(i, min(i + 3, EVENTS_PER_WRITER))]
+        if len(batch) == 1:
+            offsets.append(store.append(batch[0]))
+        else:
+            offsets.extend(store.append_many(batch))
+    results.put((writer, offsets))
+
+
+def test_concurrent_appenders(tmp_path):
+    directory = str(tmp_path / "events")
+    store = EventStore(directory, max_segment_bytes=SEGMENT_BYTES)
+
+    # forked, like the pre-forked API workers
+    ctx = multiprocessing.get_context("fork")
+    start, results = ctx.Event(), ctx.Queue()
+    writers = [
+        ctx.Process(target=append_events, args=(directory, w, start, results)) for w in range(WRITERS)
+    ]
+    for process in writers:
+        process.start()
+
+    # follow the store while it is written, the way /stream does
+    seen, offset = [], 0
+    start.set()
+    offsets = {}
+    deadline = time.monotonic() + 60
+    while len(offsets) < WRITERS:
+        assert time.monotonic() < deadline, "appenders did not finish"
+        events, offset = store.read_since(offset, limit=50)
+        seen.extend(events)
+        while not results.empty():
+            writer, writer_offsets = results.get()
+            offsets[writer] = writer_offsets
+    for process in writers:
+        process.join()
+        assert process.exitcode == 0
+
+    events, offset = store.read_since(offset)
+    seen.extend(events)
+    total = WRITERS * EVENTS_PER_WRITER
+
+    # every record read back exactly once, each writer's in its own order
+    assert offset == store.end_offset() == total
+    assert len(seen) == total
+    assert sorted((e["writer"], e["seq"]) for e in seen) == [
+        (w, j) for w in range(WRITERS) for j in range(EVENTS_PER_WRITER)
+    ]
+    for w in range(WRITERS):
+        assert [e["seq"] for e in seen if e["writer"] == w] == list(range(EVENTS_PER_WRITER))
+
+    # offsets handed to the appenders are unique and name their own records
+    everything, _ = store.read_since(0)
+    flat = sorted(o for writer_offsets in offsets.values() for o in writer_offsets)
+    assert flat == list(range(total))
+    for w, writer_offsets in offsets.items():
+        assert [everything[o] for o in writer_offsets] == [
+            {"writer": w, "seq": j} for j in range(EVENTS_PER_WRITER)
+        ]
+
+    assert len(store._bases()) > 5
+
+
+def test_read_since_resumes_across_segment_roll(tmp_path):
+    store = EventStore(str(tmp_path / "events"), max_segment_bytes=SEGMENT_BYTES)
+    for n in range(0, 200, 5):
+        store.append_many([{"n": i, "pad": "x" * 40} for i in range(n, n + 5)])
+    bases = store._bases()
+    assert len(bases) > 2
+
+    # resume from the last record of a segment, its first record and mid-way
+    # through, with limits that end exactly on and just past a boundary
+    for boundary in bases[1:]:
+        for since in (boundary - 1, boundary, boundary + 1):
+            for limit in (1, boundary - since + 1, 7, None):
+                if limit is not None and limit < 1:
+                    continue
+                events, next_offset = store.read_since(since, limit=limit)
+                expected = list(range(since, 200 if limit is None else min(since + limit, 200)))
+                assert [e["n"] for e in events] == expected
+                assert next_offset == since + len(events)
+
+    # paging with the returned offset walks every record once
+    seen, offset = [], 0
+    while offset < 200:
+        events, offset = store.read_since(offset, limit=9)
+        seen.extend(e["n"] for e in events)
+    assert seen == list(range(200))
+    assert store.read_since(offset) == ([], 200)
@@ -0,0 +1,43 @@
+import os
+import sys
+from multiprocessing import resource_tracker
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_ring import STRING_FIELDS, SharedRing, SharedRingReader
+
+
+def test_multibyte_value_past_field_width():
+    category = "Électronique-éé-ééééééééé"
+    assert len(category.encode("utf-8")) > STRING_FIELDS["product_category"]
+
+    ring = SharedRing(f"fraud_recent_test_{os.getpid()}", capacity=4)
+    reader = SharedRingReader(ring.name)
+    try:
+        ring.append({"ts": 1.0, "product_category": category, "return_reason": "Wrong Size"})
+        df = reader.recent(4)
+    finally:
+        reader.close()
+        if sys.version_info < (3, 13):
+            # the reader unregistered the segment, which this process also created
+            resource_tracker.register(ring._shm._name, "shared_memory")
+        ring.close()
+
+    stored = df["product_category"].iloc[0]
+    assert category.startswith(stored)
+    assert len(stored.encode("utf-8")) <= STRING_FIELDS["product_category"]
+    assert df["return_reason"].iloc[0] == "Wrong Size"
+
+
+def test_ring_of_running_owner_is_not_replaced():
+    ring = SharedRing(f"fraud_recent_test_{os.getpid()}", capacity=4)
+    try:
+        ring.header["owner"] = os.getppid()   # as if another live API had created it
+        with pytest.raises(FileExistsError):
+            SharedRing(ring.name, capacity=4)
+        assert not ring.header["closed"]
+    finally:
+        ring.header["owner"] = os.getpid()
+        ring.close()